@@ -0,0 +1,435 @@
+"""
+Sharded collection of the MarketDataScraper / WatchlistAndSymbolsHelper sources across worker processes or nodes.
+
+Every source is a task with a lease. Workers claim up to their fair share of tasks (total / live workers), run the
+ones that are due and keep renewing the lease while they're alive. A worker that dies stops heartbeating, its leases
+run out (or the coordinator reaps it) and the surviving workers pick its tasks up on their next claim.
+
+Every upstream request also has to take a token from its host's bucket first. The buckets live in the queue so the
+throttling is global, no matter how many workers are hitting the same website.
+
+The queue is pluggable (see CollectionQueue), SqliteCollectionQueue is enough for one box or a shared volume.
+"""
+import json
+import logging
+import math
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+import traceback
+import uuid
+
+from market_data_scraper import MarketDataScraper, WatchlistAndSymbolsHelper, MARKET_DATA_SOURCES, \
+    WATCHLIST_SOURCES
+
+
+# Host each source hits, for the shared rate budgets
+SOURCE_HOSTS = {
+    'get_futures_data_yf': 'finance.yahoo.com',
+    'get_trending_tickers_yf': 'finance.yahoo.com',
+    'get_top_volume_tickers_yf': 'finance.yahoo.com',
+    'get_top_gaining_tickers_yf': 'finance.yahoo.com',
+    'get_top_losing_tickers_yf': 'finance.yahoo.com',
+    'get_crypto_data_yf': 'finance.yahoo.com',
+    'get_index_data_yf': 'finance.yahoo.com',
+    'get_vix_data': 'finance.yahoo.com',
+    'get_currencies_data_yf': 'finance.yahoo.com',
+    'get_put_call_ratio_cboe': 'markets.cboe.com',
+    'get_next_cpi_report_timestamp': 'www.bls.gov',
+    'get_next_retail_sales_report_timestamp': 'tradingeconomics.com',
+    'get_unusual_option_volume_marketbeat': 'www.marketbeat.com',
+    'get_analysts_upgrades_downgrades_marketwatch': 'www.marketwatch.com',
+    'get_sp500_constituents': 'www.slickcharts.com',
+}
+SOURCE_HOSTS.update({name: 'finance.yahoo.com' for name in WATCHLIST_SOURCES})
+
+# Upstream requests one run of a source makes, each one takes a token. Anything not listed is 1.
+SOURCE_REQUESTS = {
+    'get_unusual_option_volume_marketbeat': 2,     # calls page + puts page
+}
+
+# Requests per second / burst per host, shared by every worker. These are free websites, be nice.
+DEFAULT_HOST_BUDGETS = {
+    'finance.yahoo.com': (0.5, 3),
+    'markets.cboe.com': (0.2, 1),
+    'www.bls.gov': (0.1, 1),
+    'tradingeconomics.com': (0.1, 1),
+    'www.marketbeat.com': (0.2, 2),
+    'www.marketwatch.com': (0.2, 1),
+    'www.slickcharts.com': (0.1, 1),
+}
+
+# Poll interval (seconds) per source
+DEFAULT_INTERVALS = {name: 60 for name in MARKET_DATA_SOURCES}
+DEFAULT_INTERVALS.update({
+    'get_next_cpi_report_timestamp': 60 * 60 * 6,
+    'get_next_retail_sales_report_timestamp': 60 * 60 * 6,
+    'get_unusual_option_volume_marketbeat': 60 * 5,
+    'get_sp500_constituents': 60 * 60,
+})
+DEFAULT_INTERVALS.update({name: 60 * 15 for name in WATCHLIST_SOURCES})
+
+
+class CollectionQueue:
+    """
+    Interface the coordinator and workers talk to. Implementations have to make each method atomic across every
+    process / node using the queue.
+    """
+
+    def register_tasks(self, intervals):
+        """Add (or update the interval of) each task, intervals is a dict of source -> seconds"""
+        raise NotImplementedError
+
+    def set_host_budget(self, host, rate, burst):
+        raise NotImplementedError
+
+    def heartbeat(self, worker_id, lease_seconds=None):
+        """Mark the worker alive, and if 'lease_seconds' is given extend the lease on every task it owns"""
+        raise NotImplementedError
+
+    def claim(self, worker_id, lease_seconds) -> list:
+        """Take / renew this worker's fair share of tasks, return the ones that are due to run now"""
+        raise NotImplementedError
+
+    def complete(self, worker_id, source, data) -> bool:
+        """
+        Store a result and schedule the next run. False if the worker no longer owns the task.
+        A failed fetch (data is False) keeps the previous result and counts an error instead.
+        """
+        raise NotImplementedError
+
+    def error_count(self, source) -> int:
+        """Failed fetches of 'source' since its last good result"""
+        raise NotImplementedError
+
+    def acquire_host_token(self, host, tokens=1) -> float:
+        """
+        Take 'tokens' from the host's bucket (capped at its burst). Returns 0 if granted, otherwise how long to wait
+        before retrying.
+        """
+        raise NotImplementedError
+
+    def reap(self, worker_timeout) -> list:
+        """Drop workers that stopped heartbeating and free their tasks, return their ids"""
+        raise NotImplementedError
+
+    def release(self, worker_id):
+        """Give up every task and deregister, for a clean shutdown"""
+        raise NotImplementedError
+
+    def latest(self, source) -> tuple or bool:
+        """(fetched timestamp, worker id, data) of the newest result, False if there isn't one"""
+        raise NotImplementedError
+
+
+class SqliteCollectionQueue(CollectionQueue):
+    """CollectionQueue on a single sqlite file. Every method is one BEGIN IMMEDIATE transaction."""
+
+    def __init__(self, path='market_data_cache/collection.sqlite3', worker_timeout=30):
+        self.path = path
+        self.worker_timeout = worker_timeout
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = None
+        with self._transaction() as cur:
+            cur.execute('CREATE TABLE IF NOT EXISTS tasks (source TEXT PRIMARY KEY, interval REAL, '
+                        'next_run REAL DEFAULT 0, owner TEXT, lease_expires REAL DEFAULT 0)')
+            cur.execute('CREATE TABLE IF NOT EXISTS workers (worker_id TEXT PRIMARY KEY, heartbeat REAL)')
+            cur.execute('CREATE TABLE IF NOT EXISTS host_budgets (host TEXT PRIMARY KEY, rate REAL, burst REAL, '
+                        'tokens REAL, updated REAL)')
+            cur.execute('CREATE TABLE IF NOT EXISTS results (source TEXT PRIMARY KEY, fetched REAL, '
+                        'worker_id TEXT, data TEXT)')
+            cur.execute('CREATE TABLE IF NOT EXISTS task_errors (source TEXT PRIMARY KEY, errors INTEGER, '
+                        'last_error REAL)')
+
+    def __str__(self):
+        return f'collection_coordinator.SqliteCollectionQueue({self.path})'
+
+    def _connection(self):
+        # Connections can't cross a fork, open one lazily in whichever process is using the queue
+        if self._conn is None or self._conn_pid != os.getpid():
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn_pid = os.getpid()
+        return self._conn
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        return state
+
+    def _transaction(self):
+        return _SqliteTransaction(self._connection())
+
+    def register_tasks(self, intervals):
+        with self._transaction() as cur:
+            for source, interval in intervals.items():
+                cur.execute('INSERT INTO tasks (source, interval) VALUES (?, ?) '
+                            'ON CONFLICT(source) DO UPDATE SET interval = excluded.interval', (source, interval))
+
+    def set_host_budget(self, host, rate, burst):
+        with self._transaction() as cur:
+            cur.execute('INSERT INTO host_budgets (host, rate, burst, tokens, updated) VALUES (?, ?, ?, ?, ?) '
+                        'ON CONFLICT(host) DO UPDATE SET rate = excluded.rate, burst = excluded.burst',
+                        (host, rate, burst, burst, time.time()))
+
+    def heartbeat(self, worker_id, lease_seconds=None):
+        now = time.time()
+        with self._transaction() as cur:
+            cur.execute('INSERT OR REPLACE INTO workers (worker_id, heartbeat) VALUES (?, ?)', (worker_id, now))
+            if lease_seconds is not None:
+                cur.execute('UPDATE tasks SET lease_expires = ? WHERE owner = ?', (now + lease_seconds, worker_id))
+
+    def claim(self, worker_id, lease_seconds) -> list:
+        now = time.time()
+        with self._transaction() as cur:
+            cur.execute('INSERT OR REPLACE INTO workers (worker_id, heartbeat) VALUES (?, ?)', (worker_id, now))
+
+            # Expired leases are up for grabs
+            cur.execute('UPDATE tasks SET owner = NULL WHERE owner IS NOT NULL AND lease_expires < ?', (now,))
+
+            total = cur.execute('SELECT COUNT(*) FROM tasks').fetchone()[0]
+            live = cur.execute('SELECT COUNT(*) FROM workers WHERE heartbeat >= ?',
+                               (now - self.worker_timeout,)).fetchone()[0]
+            share = math.ceil(total / max(live, 1))
+
+            owned = [r[0] for r in cur.execute('SELECT source FROM tasks WHERE owner = ? ORDER BY next_run DESC',
+                                               (worker_id,))]
+            if len(owned) > share:
+                # More workers joined, hand back the tasks that are furthest from running
+                excess = owned[:len(owned) - share]
+                cur.executemany('UPDATE tasks SET owner = NULL WHERE source = ?', [(s,) for s in excess])
+            elif len(owned) < share:
+                free = [r[0] for r in cur.execute('SELECT source FROM tasks WHERE owner IS NULL '
+                                                  'ORDER BY next_run LIMIT ?', (share - len(owned),))]
+                cur.executemany('UPDATE tasks SET owner = ? WHERE source = ?', [(worker_id, s) for s in free])
+
+            cur.execute('UPDATE tasks SET lease_expires = ? WHERE owner = ?', (now + lease_seconds, worker_id))
+            due = [r[0] for r in cur.execute('SELECT source FROM tasks WHERE owner = ? AND next_run <= ? '
+                                             'ORDER BY next_run', (worker_id, now))]
+        return due
+
+    def complete(self, worker_id, source, data) -> bool:
+        now = time.time()
+        with self._transaction() as cur:
+            cur.execute('UPDATE tasks SET next_run = ? + interval WHERE source = ? AND owner = ?',
+                        (now, source, worker_id))
+            if cur.rowcount == 0:
+                # Lease was lost while fetching, whoever owns it now will produce the result
+                return False
+            if data is False:
+                # Keep serving the last good result
+                cur.execute('INSERT INTO task_errors (source, errors, last_error) VALUES (?, 1, ?) '
+                            'ON CONFLICT(source) DO UPDATE SET errors = errors + 1, last_error = excluded.last_error',
+                            (source, now))
+                return True
+            cur.execute('INSERT OR REPLACE INTO results (source, fetched, worker_id, data) VALUES (?, ?, ?, ?)',
+                        (source, now, worker_id, json.dumps(data, default=str)))
+            cur.execute('DELETE FROM task_errors WHERE source = ?', (source,))
+        return True
+
+    def error_count(self, source) -> int:
+        row = self._connection().execute('SELECT errors FROM task_errors WHERE source = ?', (source,)).fetchone()
+        return 0 if row is None else row[0]
+
+    def acquire_host_token(self, host, tokens=1) -> float:
+        now = time.time()
+        with self._transaction() as cur:
+            row = cur.execute('SELECT rate, burst, tokens, updated FROM host_budgets WHERE host = ?',
+                              (host,)).fetchone()
+            if row is None:
+                return 0.0
+            rate, burst, available, updated = row
+            # More than the burst could never be granted
+            tokens = min(tokens, burst)
+            available = min(burst, available + ((now - updated) * rate))
+            if available >= tokens:
+                wait = 0.0
+                available -= tokens
+            else:
+                wait = (tokens - available) / rate
+            cur.execute('UPDATE host_budgets SET tokens = ?, updated = ? WHERE host = ?', (available, now, host))
+        return wait
+
+    def reap(self, worker_timeout=None) -> list:
+        cutoff = time.time() - (self.worker_timeout if worker_timeout is None else worker_timeout)
+        with self._transaction() as cur:
+            dead = [r[0] for r in cur.execute('SELECT worker_id FROM workers WHERE heartbeat < ?', (cutoff,))]
+            for worker_id in dead:
+                cur.execute('UPDATE tasks SET owner = NULL WHERE owner = ?', (worker_id,))
+                cur.execute('DELETE FROM workers WHERE worker_id = ?', (worker_id,))
+        return dead
+
+    def release(self, worker_id):
+        with self._transaction() as cur:
+            cur.execute('UPDATE tasks SET owner = NULL WHERE owner = ?', (worker_id,))
+            cur.execute('DELETE FROM workers WHERE worker_id = ?', (worker_id,))
+
+    def latest(self, source) -> tuple or bool:
+        row = self._connection().execute('SELECT fetched, worker_id, data FROM results WHERE source = ?',
+                                         (source,)).fetchone()
+        if row is None:
+            return False
+        return row[0], row[1], json.loads(row[2])
+
+    def assignments(self) -> dict:
+        """source -> owning worker id (None if unowned), handy for monitoring"""
+        return dict(self._connection().execute('SELECT source, owner FROM tasks'))
+
+
+class _SqliteTransaction:
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def __enter__(self):
+        self._cur = self._conn.cursor()
+        self._cur.execute('BEGIN IMMEDIATE')
+        return self._cur
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self._cur.execute('COMMIT')
+        else:
+            self._cur.execute('ROLLBACK')
+        self._cur.close()
+        return False
+
+
+def split_task_name(task) -> tuple:
+    """'market:get_vix_data' -> ('market', 'get_vix_data')"""
+    kind, _, source = task.partition(':')
+    return kind, source
+
+
+def default_tasks() -> dict:
+    tasks = {f'market:{name}': DEFAULT_INTERVALS[name] for name in MARKET_DATA_SOURCES}
+    tasks.update({f'watchlist:{name}': DEFAULT_INTERVALS[name] for name in WATCHLIST_SOURCES})
+    return tasks
+
+
+class CollectionWorker:
+    """
+    Claims tasks from the queue and runs them, waiting on the shared host budgets before every request.
+    At most 'max_tasks_per_round' due tasks are run between claims (None for all of them).
+    """
+
+    def __init__(self, queue, worker_id=None, lease_seconds=60, poll_interval=1.0, max_tasks_per_round=4):
+        self.queue = queue
+        if worker_id is None:
+            worker_id = f'{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}'
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_tasks_per_round = max_tasks_per_round
+        self._targets = {
+            'market': MarketDataScraper(),
+            'watchlist': WatchlistAndSymbolsHelper(),
+        }
+        self._running = False
+
+    def __str__(self):
+        return f'collection_coordinator.CollectionWorker({self.worker_id})'
+
+    def _wait_for_host(self, host, tokens=1):
+        while True:
+            wait = self.queue.acquire_host_token(host, tokens)
+            if wait <= 0:
+                return
+            # Keep the heartbeat and leases going during long waits so the tasks aren't reaped or claimed
+            time.sleep(min(wait, self.lease_seconds / 3))
+            self.queue.heartbeat(self.worker_id, self.lease_seconds)
+
+    def run_task(self, task) -> bool:
+        kind, source = split_task_name(task)
+        target = self._targets.get(kind)
+        if target is None:
+            logging.error(f'{self.__str__()}.run_task() - unknown task {task}')
+            return False
+
+        host = SOURCE_HOSTS.get(source)
+        if host is not None:
+            self._wait_for_host(host, SOURCE_REQUESTS.get(source, 1))
+
+        try:
+            data = getattr(target, source)()
+        except Exception:
+            logging.exception(f'{self.__str__()}.run_task() - ERROR on {task}', exc_info=traceback.format_exc())
+            data = False
+        return self.queue.complete(self.worker_id, task, data)
+
+    def run_once(self) -> list:
+        due = self.queue.claim(self.worker_id, self.lease_seconds)
+        if self.max_tasks_per_round is not None:
+            # The rest stay due, the next claim picks them up after rebalancing with any new workers
+            due = due[:self.max_tasks_per_round]
+        for task in due:
+            # Budget waits can add up across tasks, renew the leases before each one
+            self.queue.heartbeat(self.worker_id, self.lease_seconds)
+            self.run_task(task)
+        return due
+
+    def run(self):
+        self._running = True
+        try:
+            while self._running:
+                self.run_once()
+                time.sleep(self.poll_interval)
+        finally:
+            self.queue.release(self.worker_id)
+
+    def stop(self):
+        self._running = False
+
+
+def _worker_main(queue, lease_seconds, poll_interval):
+    CollectionWorker(queue, lease_seconds=lease_seconds, poll_interval=poll_interval).run()
+
+
+class CollectionCoordinator:
+    """
+    Registers the tasks and host budgets, reaps dead workers, and can run a pool of local worker processes.
+    Workers on other nodes just need a CollectionWorker pointed at the same queue.
+    """
+
+    def __init__(self, queue, tasks=None, host_budgets=None, reap_interval=5):
+        self.queue = queue
+        self.reap_interval = reap_interval
+        self.queue.register_tasks(tasks if tasks is not None else default_tasks())
+        for host, (rate, burst) in (host_budgets if host_budgets is not None else DEFAULT_HOST_BUDGETS).items():
+            self.queue.set_host_budget(host, rate, burst)
+
+    def __str__(self):
+        return 'collection_coordinator.CollectionCoordinator()'
+
+    def reap(self) -> list:
+        dead = self.queue.reap()
+        for worker_id in dead:
+            logging.warning(f'{self.__str__()}.reap() - worker {worker_id} stopped heartbeating, tasks released')
+        return dead
+
+    def run_local(self, workers=4, lease_seconds=60, poll_interval=1.0):
+        """Run 'workers' local processes, restarting any that exit, until interrupted"""
+        processes = list()
+        try:
+            while True:
+                processes = [p for p in processes if p.is_alive()]
+                while len(processes) < workers:
+                    p = multiprocessing.Process(target=_worker_main,
+                                                args=(self.queue, lease_seconds, poll_interval), daemon=True)
+                    p.start()
+                    processes.append(p)
+                self.reap()
+                time.sleep(self.reap_interval)
+        finally:
+            for p in processes:
+                p.terminate()
+                p.join()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    CollectionCoordinator(SqliteCollectionQueue()).run_local()
@@ -1,12 +1,27 @@
 import yfinance
+import numpy as np
 import pandas as pd
 from bs4 import BeautifulSoup
 import requests
+from requests.adapters import HTTPAdapter
 import time
 import datetime
 import logging
 import os
 import traceback
+import concurrent.futures
+import urllib.parse
+import hashlib
+import copy
+import functools
+import json
+import re
+import socket
+import ssl
+import threading
+from collections import OrderedDict
+from typing import NamedTuple
+from zoneinfo import ZoneInfo
 
 
 
@@ -129,9 +144,382 @@ def convert_data_strp_number(value):
         return 0
 
 
+def _nth_weekday(year, month, weekday, n) -> datetime.date:
+    """n'th (1 based) weekday of the month, n=-1 for the last one. weekday is 0=Monday"""
+    if n > 0:
+        first = datetime.date(year, month, 1)
+        return first + datetime.timedelta(days=((weekday - first.weekday()) % 7) + (7 * (n - 1)))
+    next_month = datetime.date(year + (month // 12), (month % 12) + 1, 1)
+    last = next_month - datetime.timedelta(days=1)
+    return last - datetime.timedelta(days=(last.weekday() - weekday) % 7)
+
+
+def _easter_sunday(year) -> datetime.date:
+    """Anonymous Gregorian algorithm"""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = ((19 * a) + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + (2 * e) + (2 * i) - h - k) % 7
+    m = (a + (11 * h) + (22 * l)) // 451
+    month, day = divmod(h + l - (7 * m) + 114, 31)
+    return datetime.date(year, month, day + 1)
+
+
+def _observed(day) -> datetime.date:
+    """Saturday holidays are observed Friday, Sunday holidays Monday"""
+    if day.weekday() == 5:
+        return day - datetime.timedelta(days=1)
+    if day.weekday() == 6:
+        return day + datetime.timedelta(days=1)
+    return day
+
+
+def parse_currency_pair(symbol, name) -> tuple or bool:
+    """
+    ('EURUSD=X', 'EUR/USD') -> ('EUR', 'USD'). Single currency symbols like 'JPY=X' are quoted against USD.
+    :return: (base, quote) or False if it can't be worked out
+    """
+    if '/' in name:
+        base, _, quote = name.strip().partition('/')
+        if len(base) == 3 and len(quote) == 3:
+            return base.upper(), quote.upper()
+
+    code = symbol.strip().upper().replace('=X', '')
+    if len(code) == 3:
+        return 'USD', code
+    if len(code) == 6:
+        return code[:3], code[3:]
+    return False
+
+
+# Connections per host opened by warm_up(), also the pool size for that host
+DEFAULT_POOL_SIZES = {
+    'https://finance.yahoo.com': 4,
+    'https://www.marketbeat.com': 2,
+    'https://markets.cboe.com': 1,
+    'https://www.bls.gov': 1,
+    'https://tradingeconomics.com': 1,
+    'https://www.marketwatch.com': 1,
+    'https://www.slickcharts.com': 1,
+}
+
+
+class ConnectionWarmer:
+    """
+    Resolves DNS and opens the TLS connections for each host ahead of the first scrape, straight into the
+    session's own connection pools, so the first snapshot doesn't pay for the cold handshakes.
+
+    Each host gets its own adapter sized by 'pool_sizes'. start_refresh() runs a background thread that
+    reconnects pooled connections the server has dropped while idle.
+
+    :param pool_sizes: dict of origin ('https://host[:port]') -> connections, defaults to DEFAULT_POOL_SIZES
+    """
+
+    def __init__(self, session, pool_sizes=None, settle_timeout=0.1):
+        self.session = session
+        self.pool_sizes = dict(pool_sizes if pool_sizes is not None else DEFAULT_POOL_SIZES)
+        self.settle_timeout = settle_timeout
+        self._stop = threading.Event()
+        self._thread = None
+        for origin, size in self.pool_sizes.items():
+            self.session.mount(f'{origin}/', HTTPAdapter(pool_connections=1, pool_maxsize=size))
+
+    def __str__(self):
+        return 'market_data.ConnectionWarmer()'
+
+    def _pool(self, origin):
+        """The urllib3 pool requests will use for 'origin', with the session's tls settings"""
+        adapter = self.session.get_adapter(f'{origin}/')
+        request = requests.Request('GET', f'{origin}/').prepare()
+        # Same verify / cert requests will end up using (REQUESTS_CA_BUNDLE etc. win over the session's)
+        settings = self.session.merge_environment_settings(request.url, {}, None, None, None)
+        if hasattr(adapter, 'get_connection_with_tls_context'):
+            return adapter.get_connection_with_tls_context(request, settings['verify'], cert=settings['cert'])
+        return adapter.get_connection(request.url)
+
+    @staticmethod
+    def _is_connected(conn) -> bool:
+        connected = getattr(conn, 'is_connected', None)
+        if connected is None:
+            # urllib3 < 2
+            return conn.sock is not None
+        return connected
+
+    def _settle(self, conn) -> bool:
+        """
+        TLS 1.3 servers send session tickets right after the handshake. Until something reads them the socket
+        looks readable, and urllib3 takes that as the server having dropped the connection, so read them now.
+        :return: False if the server actually closed (or sent data on) the connection
+        """
+        sock = conn.sock
+        timeout = sock.gettimeout()
+        sock.settimeout(self.settle_timeout)
+        try:
+            sock.recv(1)
+        except (socket.timeout, ssl.SSLWantReadError, BlockingIOError):
+            sock.settimeout(timeout)
+            return True
+        except OSError:
+            pass
+        conn.close()
+        return False
+
+    def warm_host(self, origin, reconnect_only=False) -> dict:
+        """
+        Open (or re-open) every connection in the pool for 'origin'.
+        :return: {'dnsSeconds', 'connectSeconds', 'connected', 'errors'}
+        """
+        stats = {'dnsSeconds': 0.0, 'connectSeconds': 0.0, 'connected': 0, 'errors': 0}
+        url = urllib.parse.urlsplit(origin)
+
+        if not reconnect_only:
+            start = time.perf_counter()
+            try:
+                socket.getaddrinfo(url.hostname, url.port or 443, proto=socket.IPPROTO_TCP)
+            except OSError:
+                logging.exception(f'{self.__str__()}.warm_host() - DNS ERROR on {origin}',
+                                  exc_info=traceback.format_exc())
+                stats['errors'] += 1
+                return stats
+            stats['dnsSeconds'] = time.perf_counter() - start
+
+        pool = self._pool(origin)
+        conns = list()
+        fresh = list()
+        start = time.perf_counter()
+        try:
+            for _ in range(self.pool_sizes.get(origin, 1)):
+                conn = pool._get_conn()
+                conns.append(conn)
+                if self._is_connected(conn):
+                    continue
+                try:
+                    conn.connect()
+                    fresh.append(conn)
+                except Exception:
+                    logging.exception(f'{self.__str__()}.warm_host() - ERROR connecting to {origin}',
+                                      exc_info=traceback.format_exc())
+                    conn.close()
+                    stats['errors'] += 1
+
+            for conn in fresh:
+                if self._settle(conn):
+                    stats['connected'] += 1
+                else:
+                    stats['errors'] += 1
+        finally:
+            for conn in conns:
+                pool._put_conn(conn)
+        stats['connectSeconds'] = time.perf_counter() - start
+        return stats
+
+    def warm_up(self) -> dict:
+        """Warm every host in parallel, returns origin -> warm_host() stats"""
+        with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, len(self.pool_sizes))) as pool:
+            jobs = {origin: pool.submit(self.warm_host, origin) for origin in self.pool_sizes}
+        return {origin: job.result() for origin, job in jobs.items()}
+
+    def refresh(self) -> dict:
+        """Reconnect any pooled connection that was dropped while idle"""
+        return {origin: self.warm_host(origin, reconnect_only=True) for origin in self.pool_sizes}
+
+    def start_refresh(self, interval=45):
+        """Call refresh() every 'interval' seconds on a daemon thread, most servers drop idle tls after ~60s"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def loop():
+            while not self._stop.wait(interval):
+                try:
+                    self.refresh()
+                except Exception:
+                    logging.exception(f'{self.__str__()}.start_refresh() - ERROR refreshing',
+                                      exc_info=traceback.format_exc())
+
+        self._stop.clear()
+        self._thread = threading.Thread(target=loop, name='connection-warmer', daemon=True)
+        self._thread.start()
+
+    def stop_refresh(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class RowFilter:
+    """
+    Filters pushed down into the table parsers. Rows are checked as they're extracted, so rejected rows are never
+    fully converted and parsing stops as soon as 'limit' rows have been accepted.
+
+    :param min_volume: minimum volume (option volume for the MarketBeat tables)
+    :param min_abs_change_percent: minimum |changePercent| (stock % change for the MarketBeat tables)
+    :param include: regex patterns, the symbol has to match at least one
+    :param exclude: regex patterns, the symbol can't match any
+    :param limit: max rows to return
+    """
+
+    def __init__(self, min_volume=None, min_abs_change_percent=None, include=None, exclude=None, limit=None):
+        self.min_volume = min_volume
+        self.min_abs_change_percent = min_abs_change_percent
+        self.include = tuple(include) if include else ()
+        self.exclude = tuple(exclude) if exclude else ()
+        self.limit = limit
+        self._include_re = re.compile('|'.join(f'(?:{p})' for p in self.include)) if self.include else None
+        self._exclude_re = re.compile('|'.join(f'(?:{p})' for p in self.exclude)) if self.exclude else None
+
+    def __repr__(self):
+        return f'RowFilter{self.key()}'
+
+    def key(self) -> tuple:
+        return self.min_volume, self.min_abs_change_percent, self.include, self.exclude, self.limit
+
+    def cache_key(self) -> str:
+        """Short stable id, for file names"""
+        return hashlib.blake2b(repr(self.key()).encode(), digest_size=6).hexdigest()
+
+    def accepts_symbol(self, symbol) -> bool:
+        if self._include_re is not None and self._include_re.search(symbol) is None:
+            return False
+        if self._exclude_re is not None and self._exclude_re.search(symbol) is not None:
+            return False
+        return True
+
+    @property
+    def filters_values(self) -> bool:
+        return self.min_volume is not None or self.min_abs_change_percent is not None
+
+    def accepts_values(self, volume, change_percent) -> bool:
+        """volume / change_percent are the values, or zero-arg callables so they're only converted if needed"""
+        if self.min_volume is not None:
+            volume = volume() if callable(volume) else volume
+            if not isinstance(volume, (int, float)) or volume < self.min_volume:
+                return False
+        if self.min_abs_change_percent is not None:
+            change_percent = change_percent() if callable(change_percent) else change_percent
+            if not isinstance(change_percent, (int, float)) or abs(change_percent) < self.min_abs_change_percent:
+                return False
+        return True
+
+    def is_full(self, count) -> bool:
+        return self.limit is not None and count >= self.limit
+
+    def without_limit(self):
+        """Same filters, no limit. For sources that merge several tables and apply the limit after."""
+        return RowFilter(self.min_volume, self.min_abs_change_percent, self.include, self.exclude)
+
+
+class AnalystRating(NamedTuple):
+    date: datetime.date
+    ticker: str
+    company: str
+    rating: str
+    analyst: str
+
+
+class MarketSessionCalendar:
+    """
+    US equity (NYSE) session calendar. Regular hours, full holidays and 1pm early closes.
+
+    Holidays / early closes are generated from the exchange rules, anything one-off (national days of
+    mourning etc.) can be passed in with 'extra_holidays' / 'extra_early_closes' as datetime.date's.
+    """
+
+    def __init__(self, extra_holidays=(), extra_early_closes=()):
+        self.tz = ZoneInfo('America/New_York')
+        self.open_time = datetime.time(9, 30)
+        self.close_time = datetime.time(16, 0)
+        self.early_close_time = datetime.time(13, 0)
+        self._extra_holidays = set(extra_holidays)
+        self._extra_early_closes = set(extra_early_closes)
+        self._years = dict()
+
+    def __str__(self):
+        return 'market_data.MarketSessionCalendar()'
+
+    def _year(self, year) -> tuple:
+        """(holidays, early closes) for the year, built once"""
+        if year in self._years:
+            return self._years[year]
+
+        holidays = {
+            _nth_weekday(year, 1, 0, 3),                                # MLK day
+            _nth_weekday(year, 2, 0, 3),                                # Presidents day
+            _easter_sunday(year) - datetime.timedelta(days=2),          # Good Friday
+            _nth_weekday(year, 5, 0, -1),                               # Memorial day
+            _observed(datetime.date(year, 7, 4)),                       # Independence day
+            _nth_weekday(year, 9, 0, 1),                                # Labor day
+            _nth_weekday(year, 11, 3, 4),                               # Thanksgiving
+            _observed(datetime.date(year, 12, 25)),                     # Christmas
+        }
+        # New years on a saturday isn't moved back into the previous year
+        new_years = datetime.date(year, 1, 1)
+        if new_years.weekday() != 5:
+            holidays.add(_observed(new_years))
+        if year >= 2022:
+            holidays.add(_observed(datetime.date(year, 6, 19)))         # Juneteenth
+
+        early_closes = {
+            _nth_weekday(year, 11, 3, 4) + datetime.timedelta(days=1),  # Day after thanksgiving
+        }
+        july_3 = datetime.date(year, 7, 3)
+        if july_3.weekday() < 5 and july_3 not in holidays:
+            early_closes.add(july_3)
+        christmas_eve = datetime.date(year, 12, 24)
+        if christmas_eve.weekday() < 5 and christmas_eve not in holidays:
+            early_closes.add(christmas_eve)
+
+        holidays |= {d for d in self._extra_holidays if d.year == year}
+        early_closes |= {d for d in self._extra_early_closes if d.year == year}
+        self._years[year] = (holidays, early_closes - holidays)
+        return self._years[year]
+
+    def is_trading_day(self, day) -> bool:
+        return day.weekday() < 5 and day not in self._year(day.year)[0]
+
+    def session_bounds(self, day) -> tuple or bool:
+        """(open, close) timestamps for the session on 'day', False if the market is closed all day"""
+        if not self.is_trading_day(day):
+            return False
+        close = self.early_close_time if day in self._year(day.year)[1] else self.close_time
+        return (datetime.datetime.combine(day, self.open_time, tzinfo=self.tz).timestamp(),
+                datetime.datetime.combine(day, close, tzinfo=self.tz).timestamp())
+
+    def is_open(self, ts=None) -> bool:
+        ts = time.time() if ts is None else ts
+        bounds = self.session_bounds(datetime.datetime.fromtimestamp(ts, self.tz).date())
+        return bounds is not False and bounds[0] <= ts < bounds[1]
+
+    def last_close(self, ts=None) -> float:
+        """Timestamp of the most recent session close at or before 'ts'"""
+        ts = time.time() if ts is None else ts
+        day = datetime.datetime.fromtimestamp(ts, self.tz).date()
+        while True:
+            bounds = self.session_bounds(day)
+            if bounds is not False and bounds[1] <= ts:
+                return bounds[1]
+            day = day - datetime.timedelta(days=1)
+
+
+# Sources that only change during the equity session. Anything not listed (crypto, futures, etc.) always polls.
+SESSION_POLICY_EQUITY = 'equity'
+SESSION_POLICY_ALWAYS = 'always'
+DEFAULT_SESSION_POLICIES = {
+    'get_top_gaining_tickers_yf': SESSION_POLICY_EQUITY,
+    'get_top_losing_tickers_yf': SESSION_POLICY_EQUITY,
+    'get_top_volume_tickers_yf': SESSION_POLICY_EQUITY,
+    'get_put_call_ratio_cboe': SESSION_POLICY_EQUITY,
+    'get_unusual_option_volume_marketbeat': SESSION_POLICY_EQUITY,
+}
+
+
 class MarketDataScraper:
 
-    def __init__(self):
+    def __init__(self, session_calendar=None, session_cache_dir='market_data_cache/sessions'):
         self._session = requests.Session()
 
         self._marketbeat_unusual_calls_vol_url = \
@@ -168,20 +556,170 @@ class MarketDataScraper:
         # url for sp 500 tickers sorted by index weight
         self._slick_charts_sp_500_url = 'https://www.slickcharts.com/sp500'
 
+        # Parsed results keyed by (url, hash of the table html). Unchanged tables skip parsing entirely.
+        self.parse_memo_size = 64
+        self._parse_memo = OrderedDict()
+
+        # Off-session, equity sources are served from the snapshot taken after the last close
+        self.session_calendar = session_calendar if session_calendar is not None else MarketSessionCalendar()
+        self.session_policies = dict(DEFAULT_SESSION_POLICIES)
+        self.session_cache_dir = session_cache_dir
+        self._session_snapshots = dict()
+        # Pages keep updating for a while after the bell (closing prints, CBOE end of day stats), the snapshot is
+        # only taken once this many seconds have passed since the close
+        self.session_settle_delay = 60 * 15
+
+        # Index constituents only change a few times a year, refreshed daily
+        self.sp500_cache_path = 'market_data_cache/sp500_constituents.json'
+        self.sp500_max_age = (60 * 60) * 24
+
+        # Kept between polls so only the pairs that moved get re-triangulated
+        self.fx_matrix = None
+
+        # Analyst upgrades / downgrades are ingested incrementally, see get_analysts_upgrades_downgrades_marketwatch()
+        self.analyst_watermark = None
+        self.analyst_rating_history = dict()
+        self.analyst_history_size = 100
+        self._analyst_fingerprint = None
+
     def __str__(self):
         return 'market_data.MiscMarketData()'
 
+    def warm_up(self, pool_sizes=None, refresh_interval=None) -> dict:
+        """
+        Resolve DNS and open the TLS connections to every host before the first scrape.
+        :param pool_sizes: dict of origin -> connections, defaults to DEFAULT_POOL_SIZES
+        :param refresh_interval: if set, keep reconnecting dropped idle connections every this many seconds
+        :return: origin -> {'dnsSeconds', 'connectSeconds', 'connected', 'errors'}
+        """
+        self.connection_warmer = ConnectionWarmer(self._session, pool_sizes)
+        stats = self.connection_warmer.warm_up()
+        if refresh_interval is not None:
+            self.connection_warmer.start_refresh(refresh_interval)
+        return stats
+
+    def _fetch_page(self, url) -> bytes or bool:
+        data = False
+        try:
+            data = self._session.get(url).content
+        except Exception as e:
+            logging.exception(f'{self.__str__()}._fetch_page() - ERROR on {url}', exc_info=traceback.format_exc())
+        finally:
+            return data
+
     def make_soup(self, url):
         data = False
+        raw_page = self._fetch_page(url)
+        if raw_page is False:
+            return data
         try:
-            raw_page = self._session.get(url)
-            data = BeautifulSoup(raw_page.content, 'lxml')
+            data = BeautifulSoup(raw_page, 'lxml')
         except Exception as e:
             logging.exception(f'{self.__str__()}.make_soup() - ERROR on {url}', exc_info=traceback.format_exc())
         finally:
             return data
 
-    def _get_marketbeat_unusual_option_volume(self, call=False, put=False) -> list:
+    def _load_session_snapshot(self, key) -> dict or None:
+        if key in self._session_snapshots:
+            return self._session_snapshots[key]
+        path = os.path.join(self.session_cache_dir, f'{key}.json')
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path) as f:
+                snapshot = json.load(f)
+        except Exception:
+            logging.exception(f'{self.__str__()}._load_session_snapshot() - ERROR reading {path}',
+                              exc_info=traceback.format_exc())
+            return None
+        self._session_snapshots[key] = snapshot
+        return snapshot
+
+    def _save_session_snapshot(self, key, data):
+        snapshot = {'fetched': time.time(), 'data': copy.deepcopy(data)}
+        self._session_snapshots[key] = snapshot
+        try:
+            os.makedirs(self.session_cache_dir, exist_ok=True)
+            with open(os.path.join(self.session_cache_dir, f'{key}.json'), 'w') as f:
+                json.dump(snapshot, f)
+        except Exception:
+            logging.exception(f'{self.__str__()}._save_session_snapshot() - ERROR on {key}',
+                              exc_info=traceback.format_exc())
+
+    def _session_guard(self, source, fetch, key=None, row_filter=None):
+        """
+        Call 'fetch' unless 'source' is an equity-session source and the market is closed. Off-session the
+        first call once session_settle_delay has passed since the close fetches and saves a snapshot, every call
+        after that returns a copy of it. Calls inside the settle window always fetch.
+        """
+        key = source if key is None else key
+        if row_filter is not None:
+            key = f'{key}_{row_filter.cache_key()}'
+        if self.session_calendar is None or self.session_policies.get(source) != SESSION_POLICY_EQUITY:
+            return fetch()
+
+        now = time.time()
+        if self.session_calendar.is_open(now):
+            return fetch()
+
+        settled = self.session_calendar.last_close(now) + self.session_settle_delay
+        if now < settled:
+            return fetch()
+
+        snapshot = self._load_session_snapshot(key)
+        if snapshot is not None and snapshot['fetched'] >= settled:
+            return copy.deepcopy(snapshot['data'])
+
+        data = fetch()
+        if data is not False:
+            self._save_session_snapshot(key, data)
+        return data
+
+    @staticmethod
+    def _page_fingerprint(raw_page, marker) -> bytes:
+        """
+        Hash of the data table in the raw html, from 'marker' to the closing table tag.
+        Falls back to the whole body if the marker isn't found.
+        """
+        start = raw_page.find(marker)
+        if start == -1:
+            return hashlib.blake2b(raw_page, digest_size=16).digest()
+        end = raw_page.find(b'</table>', start)
+        end = len(raw_page) if end == -1 else end
+        return hashlib.blake2b(raw_page[start:end], digest_size=16).digest()
+
+    def _memoized_parse(self, url, marker, parser, row_filter=None):
+        """
+        Fetch 'url' and return parser(soup), unless the table html hashes the same as a previous poll, in
+        which case return a copy of that result without building the soup at all.
+
+        If a row_filter is given it's passed on to the parser as 'row_filter=' and is part of the memo key.
+        """
+        raw_page = self._fetch_page(url)
+        if raw_page is False:
+            return False
+
+        if row_filter is not None:
+            parser = functools.partial(parser, row_filter=row_filter)
+        key = (url, self._page_fingerprint(raw_page, marker), row_filter.key() if row_filter is not None else None)
+        if key in self._parse_memo:
+            self._parse_memo.move_to_end(key)
+            return copy.deepcopy(self._parse_memo[key])
+
+        soup = BeautifulSoup(raw_page, 'lxml')
+        try:
+            data = parser(soup)
+        finally:
+            # Break the tree's parent/child cycles now instead of leaving it for the cyclic gc
+            soup.decompose()
+        del raw_page, soup
+
+        self._parse_memo[key] = copy.deepcopy(data)
+        while len(self._parse_memo) > self.parse_memo_size:
+            self._parse_memo.popitem(last=False)
+        return data
+
+    def _get_marketbeat_unusual_option_volume(self, call=False, put=False, row_filter=None) -> list:
         """Return unusual option volume for either call or put"""
 
         def get_ticker_from_column(td_tag):
@@ -340,105 +878,127 @@ class MarketDataScraper:
             finally:
                 return d
 
+        def parse_rows(soup, row_filter=None):
+            # Table tag containing rows
+            table = soup.find('tbody')
+
+            # Row data
+            rows = table.find_all('tr')
+
+            # Loop through and build dataset
+            df = list()
+            for data_row in rows:
+
+                data = dict()
+                cols = data_row.find_all('td')
+                if len(cols) != 7:
+                    continue
+                # Get the ticker from the dataset
+                tick_info = cols[0]
+                ticker = get_ticker_from_column(tick_info)
+                if ticker is False:
+                    continue
+                if row_filter is not None and not row_filter.accepts_symbol(ticker):
+                    continue
+                data['ticker'] = ticker
+
+                # Get cur stock price and stock % change
+                stock_price_data = cols[1]
+                stock_price_data = get_stock_price_data_from_column(stock_price_data)
+                if stock_price_data is False:
+                    continue
+                data.update(stock_price_data)
+
+                # Get todays volume data
+                vol_data = cols[2]
+                vol_data = get_todays_vol_data_from_column(vol_data)
+                if vol_data is False:
+                    continue
+                data.update(vol_data)
+
+                # Filter before converting the rest of the columns
+                if row_filter is not None and not row_filter.accepts_values(data['todaysOptionVolume'],
+                                                                            data['stockPercentGain']):
+                    continue
+
+                # Get avg volume data
+                avg_vol_data = cols[3]
+                a_vol_data = get_avg_vol_data_from_column(avg_vol_data)
+                if a_vol_data is False:
+                    continue
+                data.update(a_vol_data)
+
+                # Relative % increase of op volume
+                rel_incr = cols[4]
+                rel_incr = get_rel_increase_data_from_column(rel_incr)
+                if rel_incr is False:
+                    continue
+                data.update(rel_incr)
+
+                # Stock avg vol
+                a_stk_vol = cols[5]
+                a_stk_vol = get_avg_stock_volume(a_stk_vol)
+                if a_stk_vol is False:
+                    continue
+                data.update(a_stk_vol)
+
+                # Get cause of vol spike
+                cause = cols[6]
+                cause = get_cause_of_spike(cause)
+                if cause is False:
+                    continue
+                data.update(cause)
+
+                df.append(data)
+                if row_filter is not None and row_filter.is_full(len(df)):
+                    break
+
+            return df
+
         if call:
-            soup = self.make_soup(self._marketbeat_unusual_calls_vol_url)
+            url = self._marketbeat_unusual_calls_vol_url
+            key = 'marketbeat_unusual_calls'
         elif put:
-            soup = self.make_soup(self._marketbeat_unusual_puts_vol_url)
+            url = self._marketbeat_unusual_puts_vol_url
+            key = 'marketbeat_unusual_puts'
         else:
             return False
-        # Table tag containing rows
-        table = soup.find('tbody')
-
-        # Row data
-        rows = table.find_all('tr')
+        return self._session_guard('get_unusual_option_volume_marketbeat',
+                                   lambda: self._memoized_parse(url, b'<tbody', parse_rows, row_filter), key,
+                                   row_filter)
 
-        # Loop through and build dataset
-        df = list()
-        for data_row in rows:
-
-            data = dict()
-            cols = data_row.find_all('td')
-            if len(cols) != 7:
-                continue
-            # Get the ticker from the dataset
-            tick_info = cols[0]
-            ticker = get_ticker_from_column(tick_info)
-            if ticker is False:
-                continue
-            data['ticker'] = ticker
-
-            # Get cur stock price and stock % change
-            stock_price_data = cols[1]
-            stock_price_data = get_stock_price_data_from_column(stock_price_data)
-            if stock_price_data is False:
-                continue
-            data.update(stock_price_data)
-
-            # Get todays volume data
-            vol_data = cols[2]
-            vol_data = get_todays_vol_data_from_column(vol_data)
-            if vol_data is False:
-                continue
-            data.update(vol_data)
-
-            # Get avg volume data
-            avg_vol_data = cols[3]
-            a_vol_data = get_avg_vol_data_from_column(avg_vol_data)
-            if a_vol_data is False:
-                continue
-            data.update(a_vol_data)
-
-            # Relative % increase of op volume
-            rel_incr = cols[4]
-            rel_incr = get_rel_increase_data_from_column(rel_incr)
-            if rel_incr is False:
-                continue
-            data.update(rel_incr)
-
-            # Stock avg vol
-            a_stk_vol = cols[5]
-            a_stk_vol = get_avg_stock_volume(a_stk_vol)
-            if a_stk_vol is False:
-                continue
-            data.update(a_stk_vol)
-
-            # Get cause of vol spike
-            cause = cols[6]
-            cause = get_cause_of_spike(cause)
-            if cause is False:
-                continue
-            data.update(cause)
-
-            df.append(data)
-
-        return df
-
-    def get_unusual_option_volume_marketbeat(self, only_calls=False, only_puts=False) -> list or bool:
+    def get_unusual_option_volume_marketbeat(self, only_calls=False, only_puts=False, row_filter=None) -> list or bool:
         """Returns unusual option volume from www.marketbeat.com.
 
-        Can specify either only calls / only puts
+        Can specify either only calls / only puts, and a RowFilter (volume is the option volume, change percent is
+        the stock's % change). Both sides are merged highest option volume first, a limit keeps the top rows of
+        the merged list.
         """
         data = False
 
         try:
             # Calls
             if only_calls:
-                call_data = self._get_marketbeat_unusual_option_volume(call=True)
+                call_data = self._get_marketbeat_unusual_option_volume(call=True, row_filter=row_filter)
                 data = call_data
 
             # Puts
             elif only_puts:
-                put_data = self._get_marketbeat_unusual_option_volume(put=True)
+                put_data = self._get_marketbeat_unusual_option_volume(put=True, row_filter=row_filter)
                 data = put_data
 
             # Default both
             else:
 
-                call_data = self._get_marketbeat_unusual_option_volume(call=True)
-                put_data = self._get_marketbeat_unusual_option_volume(put=True)
+                # The limit is on the merged rows, a side's page order says nothing about the other side's
+                side_filter = row_filter.without_limit() if row_filter is not None else None
+                call_data = self._get_marketbeat_unusual_option_volume(call=True, row_filter=side_filter)
+                put_data = self._get_marketbeat_unusual_option_volume(put=True, row_filter=side_filter)
 
-                full_df = call_data.append(put_data)
-                full_df.sort_values(by='todaysOptionVolume', inplace=True)
+                full_df = call_data + put_data
+                full_df.sort(key=lambda row: row['todaysOptionVolume'], reverse=True)
+                if row_filter is not None and row_filter.limit is not None:
+                    full_df = full_df[:row_filter.limit]
                 data = full_df
         except Exception:
             logging.exception(f'{self.__str__()}.get_unusual_option_volume() Unknown Error',
@@ -452,7 +1012,9 @@ class MarketDataScraper:
         Return a dict type data set containing the futures and commodities data.
         :return: dict
         """
-        soup = self.make_soup(self._yf_futures_url)
+        return self._memoized_parse(self._yf_futures_url, b'yfin-list-table', self._parse_futures_data_yf)
+
+    def _parse_futures_data_yf(self, soup) -> dict:
         # This is the containing table tag
         granddad_data_table = soup.find('section', {'data-test': "yfin-list-table"})
         # Each '<tr>' tag represents the entire data row for each index future
@@ -487,12 +1049,16 @@ class MarketDataScraper:
                 convert_data_strp_number(data_actual[key]['volume'])]
         return data_actual
 
-    def get_trending_tickers_yf(self) -> dict:
+    def get_trending_tickers_yf(self, row_filter=None) -> dict:
         """
         Return a dict type data set containing the 'Trending Tickers' (most searched) of the day
+        :param row_filter: optional RowFilter applied while parsing
         :return: Dict type data set
         """
-        soup = self.make_soup(self._yf_trending_tickers_url)
+        return self._memoized_parse(self._yf_trending_tickers_url, b'yfin-list', self._parse_trending_tickers_yf,
+                                    row_filter)
+
+    def _parse_trending_tickers_yf(self, soup, row_filter=None) -> dict:
         # Master table tag
         grand_tag = soup.find('section', {'id': "yfin-list"})
         # Tags containing the row data
@@ -502,115 +1068,100 @@ class MarketDataScraper:
         headers = 'symbol,name,lastPrice,marketTime,changeDollar,changePercent,' \
                   'volume,avgVolumeThreeMonth,marketCap,_,_,_'.split(',')
         for row in row_data[1:]:
+            cells = list(row)
+            tick = cells[0].text
+
+            # Skip crypto, futures, indexes and foreign listings
+            if '-' in tick or '=' in tick or '^' in tick or '.' in tick:
+                continue
+            if row_filter is not None:
+                if not row_filter.accepts_symbol(tick):
+                    continue
+                if row_filter.filters_values and not row_filter.accepts_values(
+                        lambda: convert_alphanumeric_volume(cells[6].text),
+                        lambda: convert_data_strp_number(cells[5].text)):
+                    continue
+
             stage_one_row_data = dict()
-            for n, value in enumerate(row):
+            for n, value in enumerate(cells):
                 stage_one_row_data[headers[n]] = value.text
             stage_one_row_data.pop('_')
+            del stage_one_row_data['marketCap']
             stage_one_row_data['lastPrice'] = convert_data_strp_number(stage_one_row_data['lastPrice'])
             stage_one_row_data['changeDollar'] = convert_data_strp_number(stage_one_row_data['changeDollar'])
             stage_one_row_data['changePercent'] = convert_data_strp_number(stage_one_row_data['changePercent'])
             stage_one_row_data['avgVolumeThreeMonth'] = convert_alphanumeric_volume(
                 stage_one_row_data['avgVolumeThreeMonth'])
-            data_actual[stage_one_row_data['symbol']] = stage_one_row_data
             stage_one_row_data['volume'] = convert_alphanumeric_volume(stage_one_row_data['volume'])
-        keys_to_delete = list()
-        for tick in data_actual.keys():
-            if '-' in tick:
-                keys_to_delete.append(tick)
-            if '=' in tick:
-                keys_to_delete.append(tick)
-            if '^' in tick:
-                keys_to_delete.append(tick)
-            if '.' in tick:
-                keys_to_delete.append(tick)
-
-            del data_actual[tick]['marketCap']
-
-        for k in keys_to_delete:
-            del data_actual[k]
+            data_actual[tick] = stage_one_row_data
+
+            if row_filter is not None and row_filter.is_full(len(data_actual)):
+                break
         return data_actual
 
-    def get_top_volume_tickers_yf(self) -> dict:
+    def get_top_volume_tickers_yf(self, row_filter=None) -> dict:
         """
         Returns a dict type data set of the 'Most Traded Stocks' of the day
+        :param row_filter: optional RowFilter applied while parsing
         :return: Dict type data set
         """
+        return self._session_guard(
+            'get_top_volume_tickers_yf',
+            lambda: self._memoized_parse(self._yf_most_active_url, b'scr-res-table', self._parse_yf_screener,
+                                         row_filter),
+            row_filter=row_filter)
 
-        soup = self.make_soup(self._yf_most_active_url)
-        grand_tag = soup.find('div', {'id': "scr-res-table"})
-
-        row_data = grand_tag.table.find_all('tr')
-
-        data_actual = dict()
-        headers = 'symbol,name,lastPrice,changeDollar,changePercent,volume,avgVolumeThreeMonth,marketCap,peRatioTTM,_'.split(
-            ',')
-
-        for row in row_data:
-            stage_one_row_data = dict()
-            for n, value in enumerate(row):
-                stage_one_row_data[headers[n]] = value.text
-            stage_one_row_data.pop('_')
-            stage_one_row_data['lastPrice'] = convert_data_strp_number(stage_one_row_data['lastPrice'])
-            stage_one_row_data['changeDollar'] = convert_data_strp_number(stage_one_row_data['changeDollar'])
-            stage_one_row_data['changePercent'] = convert_data_strp_number(stage_one_row_data['changePercent'])
-            stage_one_row_data['peRatioTTM'] = convert_data_strp_number(stage_one_row_data['peRatioTTM'])
-            stage_one_row_data['volume'] = convert_alphanumeric_volume(stage_one_row_data['volume'])
-            stage_one_row_data['avgVolumeThreeMonth'] = convert_alphanumeric_volume(
-                stage_one_row_data['avgVolumeThreeMonth'])
-
-            data_actual[stage_one_row_data['symbol']] = stage_one_row_data
-
-        # Extra row snuck in there
-        del data_actual['Symbol']
-        return data_actual
-
-    def get_top_gaining_tickers_yf(self) -> dict:
+    def get_top_gaining_tickers_yf(self, row_filter=None) -> dict:
         """
         Returns a dict type data set containing in order the data for the 'Top Gaining Stocks'
+        :param row_filter: optional RowFilter applied while parsing
         :return: Dict type data set
         """
-        soup = self.make_soup(self._yf_top_gainers_url)
-        grand_tag = soup.find('div', {'id': "scr-res-table"})
-
-        row_data = grand_tag.table.find_all('tr')
-
-        data_actual = dict()
-        headers = 'symbol,name,lastPrice,changeDollar,changePercent,volume,avgVolumeThreeMonth,marketCap,peRatioTTM,_'.split(
-            ',')
+        return self._session_guard(
+            'get_top_gaining_tickers_yf',
+            lambda: self._memoized_parse(self._yf_top_gainers_url, b'scr-res-table', self._parse_yf_screener,
+                                         row_filter),
+            row_filter=row_filter)
 
-        for row in row_data[1:]:
-            stage_one_row_data = dict()
-            for n, value in enumerate(row):
-                stage_one_row_data[headers[n]] = value.text
-            stage_one_row_data.pop('_')
-            stage_one_row_data['lastPrice'] = convert_data_strp_number(stage_one_row_data['lastPrice'])
-            stage_one_row_data['changeDollar'] = convert_data_strp_number(stage_one_row_data['changeDollar'])
-            stage_one_row_data['changePercent'] = convert_data_strp_number(stage_one_row_data['changePercent'])
-            stage_one_row_data['peRatioTTM'] = convert_data_strp_number(stage_one_row_data['peRatioTTM'])
-            stage_one_row_data['volume'] = convert_alphanumeric_volume(stage_one_row_data['volume'])
-            stage_one_row_data['avgVolumeThreeMonth'] = convert_alphanumeric_volume(
-                stage_one_row_data['avgVolumeThreeMonth'])
-
-            data_actual[stage_one_row_data['symbol']] = stage_one_row_data
-        return data_actual
-
-    def get_top_losing_tickers_yf(self) -> dict:
+    def get_top_losing_tickers_yf(self, row_filter=None) -> dict:
         """
         Returns a Dict type data set containing the 'Top Losers' of the day
+        :param row_filter: optional RowFilter applied while parsing
         :return:
         """
-        soup = self.make_soup(self._yf_top_losers_url)
+        return self._session_guard(
+            'get_top_losing_tickers_yf',
+            lambda: self._memoized_parse(self._yf_top_losers_url, b'scr-res-table', self._parse_yf_screener,
+                                         row_filter),
+            row_filter=row_filter)
+
+    def _parse_yf_screener(self, soup, row_filter=None) -> dict:
+        """Parser for the yahoo screener tables (most active, gainers, losers), they all share a layout"""
         grand_tag = soup.find('div', {'id': "scr-res-table"})
 
         row_data = grand_tag.table.find_all('tr')
 
         data_actual = dict()
-        headers = 'symbol,name,lastPrice,changeDollar,changePercent,volume,avgVolumeThreeMonth,marketCap,peRatioTTM,_'.split(
-            ',')
+        headers = 'symbol,name,lastPrice,changeDollar,changePercent,volume,avgVolumeThreeMonth,marketCap,' \
+                  'peRatioTTM,_'.split(',')
+
+        for row in row_data:
+            cells = list(row)
+            tick = cells[0].text
+
+            # Header row
+            if tick == 'Symbol':
+                continue
+            if row_filter is not None:
+                if not row_filter.accepts_symbol(tick):
+                    continue
+                if row_filter.filters_values and not row_filter.accepts_values(
+                        lambda: convert_alphanumeric_volume(cells[5].text),
+                        lambda: convert_data_strp_number(cells[4].text)):
+                    continue
 
-        for row in row_data[1:]:
             stage_one_row_data = dict()
-            for n, value in enumerate(row):
+            for n, value in enumerate(cells):
                 stage_one_row_data[headers[n]] = value.text
             stage_one_row_data.pop('_')
             stage_one_row_data['lastPrice'] = convert_data_strp_number(stage_one_row_data['lastPrice'])
@@ -621,7 +1172,10 @@ class MarketDataScraper:
             stage_one_row_data['avgVolumeThreeMonth'] = convert_alphanumeric_volume(
                 stage_one_row_data['avgVolumeThreeMonth'])
 
-            data_actual[stage_one_row_data['symbol']] = stage_one_row_data
+            data_actual[tick] = stage_one_row_data
+
+            if row_filter is not None and row_filter.is_full(len(data_actual)):
+                break
         return data_actual
 
     def get_put_call_ratio_cboe(self) -> dict:
@@ -630,8 +1184,11 @@ class MarketDataScraper:
         # Note that a P/C ratio .7 or lower is considered a bull market, and vice versa
         # Note that there will always be more puts, ppl use puts to protect their stocks from sudden dips
         url = 'https://markets.cboe.com/us/options/market_statistics/daily/'
-        soup = self.make_soup(url)
+        return self._session_guard(
+            'get_put_call_ratio_cboe',
+            lambda: self._memoized_parse(url, b'daily-market-stats-data', self._parse_put_call_ratio_cboe))
 
+    def _parse_put_call_ratio_cboe(self, soup) -> dict:
         ratios_table = soup.find('div', {"id": "daily-market-stats-data"})
 
         data_tags = ratios_table.find_all('tr')
@@ -672,8 +1229,18 @@ class MarketDataScraper:
 
         url = 'https://www.bls.gov/schedule/news_release/cpi.htm'
 
-        soup = self.make_soup(url)
+        # The schedule is memoized, only the "already happened" check runs every call
+        cpi_ts_list = list()
+        for ts in self._memoized_parse(url, b'<tbody', self._parse_cpi_report_timestamps):
+            # If the report has already happened, don't add it to list
+            if time.time() > ts:
+                continue
+            else:
+                cpi_ts_list.append(ts)
+
+        return min(cpi_ts_list)
 
+    def _parse_cpi_report_timestamps(self, soup) -> list:
         table = soup.tbody
         rows = table.find_all('tr')
 
@@ -708,14 +1275,9 @@ class MarketDataScraper:
 
             # Add 6 hours so that it shows the report is that day from 6pm on
             ts = ts + ((60 * 60) * 8)
+            cpi_ts_list.append(ts)
 
-            # If the report has already happened, don't add it to list
-            if time.time() > ts:
-                continue
-            else:
-                cpi_ts_list.append(ts)
-
-        return min(cpi_ts_list)
+        return cpi_ts_list
 
     def get_next_retail_sales_report_timestamp(self) -> int:
         """
@@ -723,8 +1285,21 @@ class MarketDataScraper:
         """
 
         url = 'https://tradingeconomics.com/united-states/retail-sales'
-        soup = self.make_soup(url)
 
+        report_ts_list = list()
+        for ts in self._memoized_parse(url, b'id="calendar"', self._parse_retail_sales_report_timestamps):
+            if time.time() < ts:
+                report_ts_list.append(ts)
+
+        if len(report_ts_list) > 0:
+            return min(report_ts_list)
+        else:
+            # Return this signaling that it was a failed report grab
+            print(f'{self.__str__()}.get_next_retail_sales_report_timestamp()')
+            print('# # ERROR NO UPCOMING RETAIL SALES REPORT FOUND # #')
+            return 999999999999999
+
+    def _parse_retail_sales_report_timestamps(self, soup) -> list:
         table = soup.find('table', {'id': 'calendar'})
 
         tags = table.find_all('tr')
@@ -741,25 +1316,22 @@ class MarketDataScraper:
         for d in date_strings:
 
             ts = time.mktime(datetime.datetime.strptime(d, '%Y-%m-%d').timetuple())
+            report_ts_list.append(ts)
 
-            if time.time() < ts:
-                report_ts_list.append(ts)
+        return report_ts_list
 
-        if len(report_ts_list) > 0:
-            return min(report_ts_list)
-        else:
-            # Return this signaling that it was a failed report grab
-            print(f'{self.__str__()}.get_next_retail_sales_report_timestamp()')
-            print('# # ERROR NO UPCOMING RETAIL SALES REPORT FOUND # #')
-            return 999999999999999
-
-    def get_crypto_data_yf(self) -> dict:
+    def get_crypto_data_yf(self, row_filter=None) -> dict:
         """
         Returns a Dict type data set containing information on CryptoCurrency
+        :param row_filter: optional RowFilter applied while parsing, volume is the last 24hr volume
         :return: 'Dict'
         """
-        soup = self.make_soup(self._yf_crypto_data_url)
+        data_actual = self._memoized_parse(self._yf_crypto_data_url, b'scr-res-table', self._parse_crypto_data_yf,
+                                           row_filter)
+        self.crypto_data = data_actual
+        return data_actual
 
+    def _parse_crypto_data_yf(self, soup, row_filter=None) -> dict:
         # Table containing all the data rows.
         grand_dad_table = soup.find('div', {'id': "scr-res-table"})
 
@@ -771,8 +1343,17 @@ class MarketDataScraper:
 
         # Populate the inner data sets, and Convert the workable numbers
         for r in rows:
+            cells = list(r)
+            if row_filter is not None:
+                if not row_filter.accepts_symbol(cells[0].text):
+                    continue
+                if row_filter.filters_values and not row_filter.accepts_values(
+                        lambda: convert_alphanumeric_volume(cells[7].text),
+                        lambda: convert_data_strp_number(cells[4].text)):
+                    continue
+
             stage_one_row_data = dict()
-            for n, val in enumerate(r):
+            for n, val in enumerate(cells):
                 val = val.text
                 stage_one_row_data[headers[n]] = val
             stage_one_row_data['lastPrice'] = convert_data_strp_number(stage_one_row_data['lastPrice'])
@@ -790,7 +1371,9 @@ class MarketDataScraper:
             del stage_one_row_data['1daychart']
             del stage_one_row_data['Blahblah']
             data_actual[stage_one_row_data['symbol']] = stage_one_row_data
-        self.crypto_data = data_actual
+
+            if row_filter is not None and row_filter.is_full(len(data_actual)):
+                break
         return data_actual
 
     def get_index_data_yf(self) -> dict:
@@ -798,7 +1381,9 @@ class MarketDataScraper:
         Returns a dict type data set containing the 'Index' data for the day
         :return: dict
         """
-        soup = self.make_soup(self._yf_index_data_url)
+        return self._memoized_parse(self._yf_index_data_url, b'yfin-list-table', self._parse_index_data_yf)
+
+    def _parse_index_data_yf(self, soup) -> dict:
         # This is the containing table tag
         granddad_data_table = soup.find('section', {'data-test': "yfin-list-table"})
         # Each '<tr>' tag represents the entire data row for each index future
@@ -828,58 +1413,181 @@ class MarketDataScraper:
 
         return data_actual
 
+    def get_sp500_constituents(self, force_refresh=False) -> dict:
+        """
+        Returns a dict type data set of the S&P 500 constituents from www.slickcharts.com, keyed by symbol.
+
+        Cached on disk and only re-scraped once it's older than 'sp500_max_age' (a day). Symbols use yahoo's
+        format (BRK-B not BRK.B) so they line up with the other tables.
+        :return: {symbol: {'rank', 'company', 'symbol', 'weight', 'price'}}, weight is in percent
+        """
+        if not force_refresh and os.path.exists(self.sp500_cache_path):
+            try:
+                with open(self.sp500_cache_path) as f:
+                    cached = json.load(f)
+                if time.time() - cached['fetched'] < self.sp500_max_age:
+                    return cached['data']
+            except Exception:
+                logging.exception(f'{self.__str__()}.get_sp500_constituents() - ERROR reading cache',
+                                  exc_info=traceback.format_exc())
+
+        data = self._memoized_parse(self._slick_charts_sp_500_url, b'<table', self._parse_sp500_constituents)
+        if data is False or len(data) == 0:
+            return data
+
+        try:
+            os.makedirs(os.path.dirname(self.sp500_cache_path), exist_ok=True)
+            with open(self.sp500_cache_path, 'w') as f:
+                json.dump({'fetched': time.time(), 'data': data}, f)
+        except Exception:
+            logging.exception(f'{self.__str__()}.get_sp500_constituents() - ERROR writing cache',
+                              exc_info=traceback.format_exc())
+        return data
+
+    def _parse_sp500_constituents(self, soup) -> dict:
+        table = soup.find('table')
+        rows = table.tbody.find_all('tr') if table.tbody is not None else table.find_all('tr')[1:]
+
+        data_actual = dict()
+        for row in rows:
+            cols = row.find_all('td')
+            if len(cols) < 5:
+                continue
+            symbol = cols[2].text.strip().replace('.', '-')
+            data_actual[symbol] = {
+                'rank': safe_int_conversion(cols[0].text.strip()),
+                'company': cols[1].text.strip(),
+                'symbol': symbol,
+                'weight': convert_data_strp_number(cols[3].text),
+                'price': convert_data_strp_number(cols[4].text),
+            }
+        return data_actual
+
+    def get_currencies_data_yf(self) -> dict:
+        """
+        Returns a dict type data set containing the major currency pairs
+        :return: {symbol: {'symbol', 'name', 'base', 'quote', 'lastPrice', 'changeDollar', 'changePercent'}}
+        """
+        return self._memoized_parse(self._yf_currencies_url, b'yfin-list-table', self._parse_currencies_data_yf)
+
+    def _parse_currencies_data_yf(self, soup) -> dict:
+        # This is the containing table tag
+        granddad_data_table = soup.find('section', {'data-test': "yfin-list-table"})
+        data_rows = granddad_data_table.find_all('tr')
+        data_actual = dict()
+        headers = ['symbol', 'name', 'lastPrice', 'changeDollar', 'changePercent']
+        for row in data_rows[1:]:
+            values = [value.text for value in row]
+            if len(values) < len(headers):
+                continue
+            row_data = dict(zip(headers, values))
+            pair = parse_currency_pair(row_data['symbol'], row_data['name'])
+            if pair is False:
+                continue
+            row_data['base'], row_data['quote'] = pair
+            row_data['lastPrice'] = convert_data_strp_number(row_data['lastPrice'])
+            row_data['changeDollar'] = convert_data_strp_number(row_data['changeDollar'])
+            row_data['changePercent'] = convert_data_strp_number(row_data['changePercent'])
+            data_actual[row_data['symbol']] = row_data
+        return data_actual
+
+    def get_fx_rate_matrix(self):
+        """
+        Scrapes the currencies table and returns an FxRateMatrix of every cross rate.
+
+        The matrix is kept on 'self.fx_matrix' and later calls only update the pairs whose price changed.
+        """
+        data = self.get_currencies_data_yf()
+        if not data:
+            return self.fx_matrix if self.fx_matrix is not None else False
+
+        pairs = [(row['base'], row['quote'], row['lastPrice']) for row in data.values()]
+        if self.fx_matrix is None:
+            self.fx_matrix = FxRateMatrix(pairs)
+        else:
+            self.fx_matrix.update(pairs)
+        return self.fx_matrix
+
     def get_vix_data(self) -> dict:
         base = self.get_index_data_yf()
         return base['^VIX']
 
-    def get_analysts_upgrades_downgrades_marketwatch(self):
+    def get_analysts_upgrades_downgrades_marketwatch(self) -> list or bool:
+        """
+        Returns the analyst upgrades / downgrades from www.marketwatch.com that haven't been seen yet, newest first.
 
-        def add_data_to_dict(n_check, n_val, key, val, storage_dict):
+        Remembers a (date, ticker, analyst) watermark of the newest row, the next poll stops parsing as soon as it
+        gets back to it, and an unchanged table isn't parsed at all. Every record is also added to
+        'analyst_rating_history' (see get_analyst_rating_history()).
+        :return: list of AnalystRating, False if the page couldn't be fetched
+        """
+        url = "https://www.marketwatch.com/tools/upgrades-downgrades"
 
-            if n_val == n_check:
-                storage_dict[key] = val.string
+        raw_page = self._fetch_page(url)
+        if raw_page is False:
+            return False
 
-        url = "https://www.marketwatch.com/tools/upgrades-downgrades"
+        fingerprint = self._page_fingerprint(raw_page, b'<table')
+        if fingerprint == self._analyst_fingerprint:
+            return list()
+
+        soup = BeautifulSoup(raw_page, 'lxml')
+        try:
+            records = self._parse_analysts_upgrades_downgrades_marketwatch(soup, self.analyst_watermark)
+        finally:
+            soup.decompose()
+        del raw_page, soup
+
+        self._analyst_fingerprint = fingerprint
+        if len(records) > 0:
+            newest = records[0]
+            self.analyst_watermark = (newest.date, newest.ticker, newest.analyst)
+
+        # Oldest first so each ticker's history stays in chronological order
+        for record in reversed(records):
+            history = self.analyst_rating_history.setdefault(record.ticker, list())
+            history.append(record)
+            if len(history) > self.analyst_history_size:
+                del history[:len(history) - self.analyst_history_size]
 
-        soup = self.make_soup(url)
+        return records
 
+    def get_analyst_rating_history(self, ticker) -> list:
+        """Every rating change seen for 'ticker' since this scraper started polling, oldest first"""
+        return list(self.analyst_rating_history.get(ticker, list()))
+
+    def _parse_analysts_upgrades_downgrades_marketwatch(self, soup, watermark=None) -> list:
+        """Rows are newest first, stop at the watermark row (or anything older than its date)"""
         table = soup.find('table')
         raw_data_rows = table.find_all('tr')
 
-        row_text_data = list()
-
+        records = list()
         for tr in raw_data_rows[1:]:
+            # date, ticker, company, rating, analyst
+            cols = tr.find_all('td', limit=5)
+            if len(cols) < 5:
+                continue
+
+            try:
+                date = datetime.datetime.strptime(cols[0].get_text(strip=True), '%m/%d/%Y').date()
+            except ValueError:
+                continue
+            ticker = cols[1].get_text(strip=True)
+            analyst = cols[4].get_text(strip=True)
+
+            if watermark is not None:
+                if (date, ticker, analyst) == watermark or date < watermark[0]:
+                    break
+
+            records.append(AnalystRating(
+                date=date,
+                ticker=ticker,
+                company=cols[2].get_text(strip=True),
+                rating=cols[3].get_text(strip=True),
+                analyst=analyst,
+            ))
 
-            #
-            # 1 11/16/2021
-            # 2
-            #
-            # 3 HHR
-            # 4
-            #
-            # 5 HeadHunter Group
-            # 6
-            #
-            # 7 Maintains
-            # 8
-            #
-            # 9 Credit Suisse
-            # 10
-            #
-            # 11 None
-            # 12
-
-            data = dict()
-            for n, td in enumerate(tr):
-                add_data_to_dict(1, n, "date", td.string, data)
-                add_data_to_dict(3, n, "ticker", td.string, data)
-                add_data_to_dict(5, n, "company", td.string, data)
-                add_data_to_dict(7, n, "rating", td.string, data)
-                add_data_to_dict(9, n, "analyst", td.string, data)
-
-            row_text_data.append(data)
-
-        print(row_text_data)
+        return records
 
 
 class WatchlistAndSymbolsHelper:
@@ -893,22 +1601,43 @@ class WatchlistAndSymbolsHelper:
         # One month
         self.barchart_stats_update_interval = (((60 * 60) * 24) * 3)
 
+    def __str__(self):
+        return 'market_data.WatchlistAndSymbolsHelper()'
+
+    def warm_up(self, pool_sizes=None, refresh_interval=None) -> dict:
+        """
+        Same as MarketDataScraper.warm_up(), for the watchlist session. Only yahoo is needed here.
+        :param pool_sizes: dict of origin -> connections, defaults to yahoo only
+        :param refresh_interval: if set, keep reconnecting dropped idle connections every this many seconds
+        :return: origin -> {'dnsSeconds', 'connectSeconds', 'connected', 'errors'}
+        """
+        if pool_sizes is None:
+            pool_sizes = {'https://finance.yahoo.com': DEFAULT_POOL_SIZES['https://finance.yahoo.com']}
+        self.connection_warmer = ConnectionWarmer(self.session_firefox, pool_sizes)
+        stats = self.connection_warmer.warm_up()
+        if refresh_interval is not None:
+            self.connection_warmer.start_refresh(refresh_interval)
+        return stats
+
     def scrape_yf_watchlists(self, url):
         """Use the linkes from the "Watchlist" section of finance.yahoo.com to build watchlists"""
         soup = BeautifulSoup(self.session_firefox.get(url).content, "lxml")
-        table = soup.find("table", {"class": "cwl-symbols W(100%)"})
-
-        raw_rows = table.find_all("tr")
-        data = list()
-        for row in raw_rows:
-            td_tags = row.find_all("td")
-            if len(td_tags) < 1:
-                continue
-            sym = td_tags[0].text
-            if isinstance(sym, str) is False:
-                continue
-            if sym.isupper():
-                data.append(sym)
+        try:
+            table = soup.find("table", {"class": "cwl-symbols W(100%)"})
+
+            raw_rows = table.find_all("tr")
+            data = list()
+            for row in raw_rows:
+                td_tags = row.find_all("td")
+                if len(td_tags) < 1:
+                    continue
+                sym = td_tags[0].text
+                if isinstance(sym, str) is False:
+                    continue
+                if sym.isupper():
+                    data.append(sym)
+        finally:
+            soup.decompose()
 
         return data
 
@@ -934,18 +1663,441 @@ class WatchlistAndSymbolsHelper:
         )
 
     def get_watchlist_yf_trending_tickers(self):
-        soup_base = BeautifulSoup(requests.get("https://finance.yahoo.com/trending-tickers").content, 'lxml')
-        table = soup_base.find("table", {"class": "W(100%)"})
-
-        ticks = list()
-        for row in table.find_all("tr"):
-            data_points = row.find_all("td")
-            if len(data_points) > 0:
-                if "-" not in data_points[0].text and "." not in data_points[0].text:
-                    ticks.append(data_points[0].text)
+        raw_page = self.session_firefox.get("https://finance.yahoo.com/trending-tickers").content
+        soup_base = BeautifulSoup(raw_page, 'lxml')
+        try:
+            table = soup_base.find("table", {"class": "W(100%)"})
+
+            ticks = list()
+            for row in table.find_all("tr"):
+                data_points = row.find_all("td")
+                if len(data_points) > 0:
+                    if "-" not in data_points[0].text and "." not in data_points[0].text:
+                        ticks.append(data_points[0].text)
+        finally:
+            soup_base.decompose()
 
         return ticks
 
 
+def _yfinance_transport(symbols, interval, period=None, start=None) -> dict:
+    """
+    Default transport for BulkQuoteFetcher, one yfinance.download() call for the whole chunk.
+    :return: dict of symbol -> DataFrame (only the symbols that came back with rows)
+    """
+    if start is not None:
+        raw = yfinance.download(symbols, start=start, interval=interval, group_by='ticker',
+                                threads=False, progress=False)
+    else:
+        raw = yfinance.download(symbols, period=period, interval=interval, group_by='ticker',
+                                threads=False, progress=False)
+
+    data = dict()
+    if raw is None or raw.empty:
+        return data
+    for sym in symbols:
+        if isinstance(raw.columns, pd.MultiIndex):
+            if sym not in raw.columns.get_level_values(0):
+                continue
+            frame = raw[sym]
+        else:
+            # Single symbol downloads come back with flat columns
+            frame = raw
+        frame = frame.dropna(how='all')
+        if not frame.empty:
+            data[sym] = frame
+    return data
+
+
+class BulkQuoteFetcher:
+    """
+    Fetches price history / quotes for a lot of symbols at once.
+
+    Symbols are split into chunks of 'chunk_size' and each chunk is one transport call on a thread pool.
+    History is cached on disk by (symbol, interval, period) and a refresh only asks for the bars after the
+    last cached one.
+
+    'transport' is any callable(symbols, interval, period=None, start=None) -> {symbol: DataFrame}, so it can
+    be swapped for a local stand-in. Defaults to yfinance.
+    """
+
+    def __init__(self, cache_dir='market_data_cache/history', chunk_size=50, max_workers=4, transport=None):
+        self.cache_dir = cache_dir
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers
+        self._transport = transport if transport is not None else _yfinance_transport
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def __str__(self):
+        return 'market_data.BulkQuoteFetcher()'
+
+    def _cache_path(self, symbol, interval, period):
+        name = urllib.parse.quote(f'{symbol}_{interval}_{period}', safe='')
+        return os.path.join(self.cache_dir, f'{name}.pkl')
+
+    def _load_cached(self, symbol, interval, period):
+        path = self._cache_path(symbol, interval, period)
+        if not os.path.exists(path):
+            return None
+        try:
+            return pd.read_pickle(path)
+        except Exception:
+            logging.exception(f'{self.__str__()}._load_cached() - ERROR reading {path}',
+                              exc_info=traceback.format_exc())
+            return None
+
+    @staticmethod
+    def _trim_to_period(frame, period):
+        """
+        Drop the bars older than 'period' (counted back from the last bar) so appended tails don't grow the
+        cache forever. 'Nd' is N trading days like yfinance, so it keeps the bars of the last N dates.
+        """
+        if frame.empty or period in (None, 'max'):
+            return frame
+        last = frame.index[-1]
+        if period == 'ytd':
+            return frame[frame.index.year == last.year]
+
+        match = re.fullmatch(r'(\d+)(d|mo|y)', period)
+        if match is None:
+            return frame
+        count, unit = int(match.group(1)), match.group(2)
+        if unit == 'd':
+            dates = frame.index.normalize()
+            keep = dates.unique()[-count:]
+            return frame[dates.isin(keep)]
+        offset = pd.DateOffset(months=count) if unit == 'mo' else pd.DateOffset(years=count)
+        return frame[frame.index > last - offset]
+
+    def _chunks(self, symbols):
+        for i in range(0, len(symbols), self.chunk_size):
+            yield symbols[i:i + self.chunk_size]
+
+    def _fetch_chunk(self, chunk, interval, period, start=None) -> dict:
+        try:
+            return self._transport(chunk, interval, period=period, start=start)
+        except Exception:
+            logging.exception(f'{self.__str__()}._fetch_chunk() - ERROR on {chunk[0]}..{chunk[-1]}',
+                              exc_info=traceback.format_exc())
+            return dict()
+
+    def get_history(self, symbols, interval='1d', period='1mo', refresh=True) -> dict:
+        """
+        Returns a dict of symbol -> DataFrame of price history.
+
+        Symbols already on disk only have their missing tail fetched (or nothing at all if refresh=False),
+        everything else gets the full 'period'.
+        """
+        symbols = list(dict.fromkeys(symbols))
+        data = dict()
+        cold = list()
+        warm = list()
+        for sym in symbols:
+            cached = self._load_cached(sym, interval, period)
+            if cached is None or cached.empty:
+                cold.append(sym)
+            else:
+                data[sym] = cached
+                warm.append(sym)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            jobs = dict()
+            for chunk in self._chunks(cold):
+                jobs[pool.submit(self._fetch_chunk, chunk, interval, period)] = False
+            if refresh:
+                for chunk in self._chunks(warm):
+                    # The last cached bar may still have been forming, so re-fetch from it
+                    start = min(data[sym].index[-1] for sym in chunk)
+                    jobs[pool.submit(self._fetch_chunk, chunk, interval, period, start)] = True
+
+            for job in concurrent.futures.as_completed(jobs):
+                is_tail = jobs[job]
+                for sym, frame in job.result().items():
+                    if is_tail and sym in data:
+                        frame = pd.concat([data[sym], frame])
+                        frame = frame[~frame.index.duplicated(keep='last')].sort_index()
+                        frame = self._trim_to_period(frame, period)
+                    data[sym] = frame
+                    frame.to_pickle(self._cache_path(sym, interval, period))
+
+        return data
+
+    def get_quotes(self, symbols) -> dict:
+        """
+        Returns a dict of symbol -> latest quote built from the daily bars.
+        :return: {'lastPrice', 'changeDollar', 'changePercent', 'volume'}
+        """
+        history = self.get_history(symbols, interval='1d', period='5d')
+        data = dict()
+        for sym, frame in history.items():
+            closes = frame['Close'].dropna()
+            if len(closes) < 1:
+                continue
+            last = float(closes.iloc[-1])
+            prev = float(closes.iloc[-2]) if len(closes) > 1 else last
+            change = last - prev
+            data[sym] = {
+                'lastPrice': last,
+                'changeDollar': change,
+                'changePercent': (change / prev) * 100 if prev else 0.0,
+                'volume': int(frame['Volume'].fillna(0).iloc[-1]),
+            }
+        return data
+
+    @staticmethod
+    def collect_symbols(scraper=None, watchlist_helper=None, watchlists=None) -> list:
+        """
+        Builds the symbol universe from the top volume screener and the yahoo watchlists.
+        :param watchlists: names of WatchlistAndSymbolsHelper methods, defaults to all of them
+        """
+        symbols = list()
+        if scraper is not None:
+            try:
+                symbols.extend(scraper.get_top_volume_tickers_yf().keys())
+            except Exception:
+                logging.exception('market_data.BulkQuoteFetcher.collect_symbols() - ERROR on top volume',
+                                  exc_info=traceback.format_exc())
+        if watchlist_helper is not None:
+            for name in watchlists if watchlists is not None else WATCHLIST_SOURCES:
+                try:
+                    symbols.extend(getattr(watchlist_helper, name)())
+                except Exception:
+                    logging.exception(f'market_data.BulkQuoteFetcher.collect_symbols() - ERROR on {name}',
+                                      exc_info=traceback.format_exc())
+        return list(dict.fromkeys(symbols))
+
+
+class FxRateMatrix:
+    """
+    Every cross rate between the quoted currencies as one numpy matrix, rates[i, j] = units of j per unit of i.
+
+    Each currency is valued in the 'anchor' (USD) by walking the quoted pairs, the whole matrix is then the outer
+    ratio of those values. Directly quoted crosses (EUR/JPY etc.) override the triangulated rate.
+
+    :param pairs: iterable of (base, quote, rate) where 1 base = rate quote
+    """
+
+    def __init__(self, pairs, anchor='USD'):
+        self.anchor = anchor
+        self._quotes = dict()
+        self._build(pairs)
+
+    def __str__(self):
+        return 'market_data.FxRateMatrix()'
+
+    def _build(self, pairs):
+        for base, quote, rate in pairs:
+            if rate:
+                self._quotes[(base, quote)] = float(rate)
+
+        # Value every currency in the anchor. Direct anchor legs first, then walk out through the crosses.
+        # _routes remembers which pair priced each currency so an update can re-price just its dependents.
+        anchor_values = {self.anchor: 1.0}
+        self._routes = dict()
+        for (base, quote), rate in self._quotes.items():
+            if quote == self.anchor:
+                anchor_values[base] = rate
+                self._routes[base] = (base, quote)
+            elif base == self.anchor:
+                anchor_values[quote] = 1 / rate
+                self._routes[quote] = (base, quote)
+        changed = True
+        while changed:
+            changed = False
+            for (base, quote), rate in self._quotes.items():
+                if quote in anchor_values and base not in anchor_values:
+                    anchor_values[base] = rate * anchor_values[quote]
+                    self._routes[base] = (base, quote)
+                    changed = True
+                elif base in anchor_values and quote not in anchor_values:
+                    anchor_values[quote] = anchor_values[base] / rate
+                    self._routes[quote] = (base, quote)
+                    changed = True
+        self._routed_by = {pair: code for code, pair in self._routes.items()}
+
+        self.codes = np.array(sorted(anchor_values.keys()))
+        self._index = {code: i for i, code in enumerate(self.codes.tolist())}
+        self.anchor_values = np.array([anchor_values[code] for code in self.codes.tolist()], dtype=np.float64)
+        self.rates = self.anchor_values[:, None] / self.anchor_values[None, :]
+        for pair in self._quotes.keys():
+            self._apply_direct(pair)
+
+    def _is_cross(self, pair) -> bool:
+        return self.anchor not in pair
+
+    def _apply_direct(self, pair):
+        if not self._is_cross(pair):
+            return
+        i = self._index.get(pair[0])
+        j = self._index.get(pair[1])
+        if i is not None and j is not None:
+            self.rates[i, j] = self._quotes[pair]
+            self.rates[j, i] = 1 / self._quotes[pair]
+
+    def _reprice(self, code):
+        """Re-value 'code' from its route, rewrite its row and column, then do the same for its dependents"""
+        base, quote = self._routes[code]
+        rate = self._quotes[(base, quote)]
+        if code == base:
+            value = rate * self.anchor_values[self._index[quote]]
+        else:
+            value = self.anchor_values[self._index[base]] / rate
+
+        i = self._index[code]
+        self.anchor_values[i] = value
+        self.rates[i, :] = value / self.anchor_values
+        self.rates[:, i] = self.anchor_values / value
+        for pair in self._quotes.keys():
+            if code in pair:
+                self._apply_direct(pair)
+
+        for dependent, route in self._routes.items():
+            if dependent != code and code in route:
+                self._reprice(dependent)
+
+    def update(self, pairs) -> int:
+        """
+        Apply new quotes. Only the pairs that changed are touched: a pair that prices a currency re-writes that
+        currency's row and column (and those of anything priced through it), any other cross just its two cells.
+        New currencies rebuild the matrix.
+        :return: number of pairs that changed
+        """
+        changed = list()
+        for base, quote, rate in pairs:
+            if not rate or self._quotes.get((base, quote)) == float(rate):
+                continue
+            changed.append((base, quote))
+            self._quotes[(base, quote)] = float(rate)
+
+        if any(base not in self._index or quote not in self._index for base, quote in changed):
+            self._build([])
+            return len(changed)
+
+        for pair in changed:
+            if pair in self._routed_by:
+                self._reprice(self._routed_by[pair])
+            else:
+                self._apply_direct(pair)
+        return len(changed)
+
+    def indices(self, codes) -> np.ndarray:
+        """Row / column index of each currency code, raises KeyError for unknown codes"""
+        return np.array([self._index[code] for code in codes], dtype=np.intp)
+
+    def rate(self, base, quote) -> float:
+        return float(self.rates[self._index[base], self._index[quote]])
+
+    def convert(self, values, from_codes, to_code) -> np.ndarray:
+        """
+        Convert an array of amounts, each in its own currency, into 'to_code' in one vectorized step.
+        'from_codes' can be a single code or one per value.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        column = self.rates[:, self._index[to_code]]
+        if isinstance(from_codes, str):
+            return values * column[self._index[from_codes]]
+        from_codes = np.asarray(from_codes)
+        pos = np.searchsorted(self.codes, from_codes)
+        pos[pos == len(self.codes)] = 0
+        if not np.all(self.codes[pos] == from_codes):
+            raise KeyError(f'unknown currency in {np.unique(from_codes[self.codes[pos] != from_codes]).tolist()}')
+        return values * column[pos]
+
+
+class IndexContributionEngine:
+    """
+    Vectorized index point contribution for the S&P 500 (or any weighted index).
+
+    The constituents are laid out once into sorted numpy arrays, after that every compute() is a searchsorted
+    join of the quote symbols against them plus a handful of array ops, no per-constituent python loop.
+
+    :param constituents: MarketDataScraper.get_sp500_constituents() output
+    :param sectors: optional dict of symbol -> sector name for the sector aggregates (slickcharts doesn't list
+        sectors). Constituents without one are grouped under 'Unknown'.
+    """
+
+    def __init__(self, constituents, sectors=None):
+        symbols = sorted(constituents.keys())
+        self.symbols = np.array(symbols)
+        self.weights = np.array([constituents[sym]['weight'] for sym in symbols], dtype=np.float64) / 100
+
+        sectors = sectors if sectors is not None else dict()
+        sector_names = [sectors.get(sym, 'Unknown') for sym in symbols]
+        self.sector_names, self.sector_codes = np.unique(np.array(sector_names), return_inverse=True)
+
+    def __str__(self):
+        return 'market_data.IndexContributionEngine()'
+
+    def _join(self, quote_tables) -> np.ndarray:
+        """changePercent for every constituent (nan where no table has it). Later tables win."""
+        changes = np.full(len(self.symbols), np.nan)
+        for table in quote_tables:
+            if not table:
+                continue
+            quote_symbols = np.array(list(table.keys()))
+            quote_changes = np.fromiter((row.get('changePercent', np.nan) if isinstance(row, dict) else np.nan
+                                         for row in table.values()), dtype=np.float64, count=len(table))
+
+            pos = np.searchsorted(self.symbols, quote_symbols)
+            pos[pos == len(self.symbols)] = 0
+            matched = (self.symbols[pos] == quote_symbols) & ~np.isnan(quote_changes)
+            changes[pos[matched]] = quote_changes[matched]
+        return changes
+
+    def compute(self, quote_tables, index_level) -> dict:
+        """
+        Point / percent contribution of each constituent to the index move.
+
+        :param quote_tables: list of symbol keyed quote dicts with a 'changePercent', e.g. the output of
+            get_top_gaining_tickers_yf(), get_top_losing_tickers_yf() and BulkQuoteFetcher.get_quotes()
+        :param index_level: the index's previous close, points = level * weight * change
+        :return: dict with 'totalPoints', 'totalPercent', 'coverageWeight' (weight of the constituents that had a
+            quote), 'bySymbol' {symbol: points} for the quoted constituents and 'bySector' {sector: points}
+        """
+        changes = self._join(quote_tables)
+        quoted = ~np.isnan(changes)
+
+        contribution_pct = np.where(quoted, self.weights * changes, 0.0)
+        contribution_pts = contribution_pct * (index_level / 100)
+        by_sector = np.bincount(self.sector_codes, weights=contribution_pts, minlength=len(self.sector_names))
+
+        return {
+            'totalPoints': float(contribution_pts.sum()),
+            'totalPercent': float(contribution_pct.sum()),
+            'coverageWeight': float(self.weights[quoted].sum()),
+            'bySymbol': dict(zip(self.symbols[quoted].tolist(), contribution_pts[quoted].tolist())),
+            'bySector': dict(zip(self.sector_names.tolist(), by_sector.tolist())),
+        }
+
+
+# Zero-argument scrape methods, by name, for code that polls every source (publishers, collectors, etc.)
+MARKET_DATA_SOURCES = (
+    'get_futures_data_yf',
+    'get_trending_tickers_yf',
+    'get_top_volume_tickers_yf',
+    'get_top_gaining_tickers_yf',
+    'get_top_losing_tickers_yf',
+    'get_put_call_ratio_cboe',
+    'get_next_cpi_report_timestamp',
+    'get_next_retail_sales_report_timestamp',
+    'get_crypto_data_yf',
+    'get_index_data_yf',
+    'get_vix_data',
+    'get_unusual_option_volume_marketbeat',
+    'get_sp500_constituents',
+    'get_currencies_data_yf',
+)
+
+WATCHLIST_SOURCES = (
+    'get_watchlist_yf_most_watched',
+    'get_watchlist_yf_biggest_52wk_gains',
+    'get_watchlist_yf_recent_52wk_highs',
+    'get_watchlist_yf_biggest_52wk_losses',
+    'get_watchlist_yf_most_shorted_stocks',
+    'get_watchlist_yf_most_newly_added',
+    'get_watchlist_yf_trending_tickers',
+)
+
+
 if __name__ == '__main__':
     pass
@@ -0,0 +1,121 @@
+"""
+Encode / decode throughput of json.dumps (the current nested dicts) vs the Arrow IPC and msgpack serializers in
+snapshot_serialization, on synthetic snapshots sized like the real pages.
+
+    python serialization_benchmark.py --rounds 200
+"""
+import argparse
+import datetime
+import json
+import random
+import string
+import time
+
+import snapshot_serialization as ser
+from market_data_scraper import AnalystRating
+
+
+def _symbol(n):
+    return ''.join(random.choice(string.ascii_uppercase) for _ in range(n))
+
+
+def _value(field, kind):
+    if kind == 'float64':
+        return round(random.uniform(-100, 1000), 2)
+    if kind == 'int64':
+        return random.randint(0, 10 ** 9)
+    if kind == 'date32':
+        return datetime.date.today() - datetime.timedelta(days=random.randint(0, 30))
+    if kind == 'list<string>':
+        return [f'Event {i}' for i in range(random.randint(0, 3))]
+    if field == 'symbol' or field == 'ticker':
+        return _symbol(4)
+    return f'{field} {_symbol(8)}'
+
+
+def synthetic_snapshot(source, rows=100):
+    """Fake result for 'source' in the exact shape its get_* method returns"""
+    shape, fields = ser.SCHEMAS[source]
+    if shape == ser.SCALAR:
+        return time.time()
+    if shape == ser.VALUES:
+        return [_symbol(4) for _ in range(rows)]
+
+    built = list()
+    for _ in range(1 if shape == ser.RECORD else rows):
+        row = {field: _value(field, kind) for field, kind in fields}
+        if source == 'get_futures_data_yf':
+            row['volume'] = [str(row.pop('volumeText')), row['volume']]
+        if source == 'get_analysts_upgrades_downgrades_marketwatch':
+            row = AnalystRating(**row)
+        built.append(row)
+
+    if shape == ser.RECORD:
+        return built[0]
+    if shape == ser.KEYED:
+        return {row['symbol']: row for row in built}
+    return built
+
+
+def _json_default(value):
+    return value.isoformat() if isinstance(value, datetime.date) else str(value)
+
+
+def _time(func, rounds) -> float:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds
+
+
+def bench(source, data, rounds) -> list:
+    results = list()
+
+    json_payload = json.dumps(data, default=_json_default).encode()
+    results.append(('json', len(json_payload),
+                    _time(lambda: json.dumps(data, default=_json_default).encode(), rounds),
+                    _time(lambda: json.loads(json_payload), rounds), None))
+
+    if ser.msgpack is not None:
+        payload = ser.encode_msgpack(source, data)
+        results.append(('msgpack', len(payload),
+                        _time(lambda: ser.encode_msgpack(source, data), rounds),
+                        _time(lambda: ser.decode_msgpack(payload), rounds),
+                        _time(lambda: ser.to_records(ser.decode_msgpack(payload)), rounds)))
+
+    if ser.pa is not None:
+        payload = ser.encode_arrow(source, data)
+        results.append(('arrow', len(payload),
+                        _time(lambda: ser.encode_arrow(source, data), rounds),
+                        _time(lambda: ser.decode_arrow(payload), rounds),
+                        _time(lambda: ser.to_records(ser.decode_arrow(payload)), rounds)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rounds', type=int, default=200)
+    parser.add_argument('--rows', type=int, default=100, help='rows per table shaped snapshot')
+    parser.add_argument('--sources', nargs='*', default=sorted(ser.SCHEMAS.keys()))
+    args = parser.parse_args()
+
+    random.seed(0)
+    print(f'{"source":<46} {"format":<8} {"bytes":>9} {"encode us":>10} {"decode us":>10} {"to dicts us":>12}')
+    totals = dict()
+    for source in args.sources:
+        data = synthetic_snapshot(source, args.rows)
+        for fmt, size, encode, decode, records in bench(source, data, args.rounds):
+            total = totals.setdefault(fmt, [0, 0.0, 0.0])
+            total[0] += size
+            total[1] += encode
+            total[2] += decode
+            records = f'{records * 1e6:12.1f}' if records is not None else f'{"-":>12}'
+            print(f'{source:<46} {fmt:<8} {size:>9} {encode * 1e6:10.1f} {decode * 1e6:10.1f} {records}')
+
+    print('\nAll sources:')
+    for fmt, (size, encode, decode) in totals.items():
+        print(f'{fmt:<8} {size:>9} bytes  encode {encode * 1e6:10.1f}us  decode {decode * 1e6:10.1f}us')
+
+
+if __name__ == '__main__':
+    main()
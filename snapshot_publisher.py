@@ -0,0 +1,295 @@
+import json
+import logging
+import multiprocessing
+import os
+import struct
+import sys
+import time
+import traceback
+from multiprocessing import shared_memory, resource_tracker
+
+import snapshot_serialization
+from market_data_scraper import MARKET_DATA_SOURCES
+
+
+# Block header: magic, slot count, slot size, latest committed sequence number, encoding, publisher pid
+_BLOCK_HEADER = struct.Struct('<8sIIQ8sQ')
+_LATEST_SEQ_OFFSET = 16
+
+# Slot header: sequence number, publish timestamp, payload length
+_SLOT_HEADER = struct.Struct('<QdI4x')
+
+_MAGIC = b'MDSNAP02'
+
+# Payload encodings. Arrow uses the fixed per-source schemas in snapshot_serialization, readers get a zero-copy
+# pyarrow.Table straight over shared memory. JSON is the fallback when pyarrow isn't installed.
+ENCODING_ARROW = 'arrow'
+ENCODING_JSON = 'json'
+ENCODING_CUSTOM = 'custom'
+
+
+def _json_encode(data) -> bytes:
+    return json.dumps(data, default=str, separators=(',', ':')).encode('utf-8')
+
+
+def _json_decode(payload) -> any:
+    return json.loads(bytes(payload))
+
+
+def _arrow_decode(payload) -> any:
+    # The table only lives inside this call, so the payload view can be released right after
+    return snapshot_serialization.to_records(snapshot_serialization.decode_arrow(payload))
+
+
+def default_encoding() -> str:
+    return ENCODING_ARROW if snapshot_serialization.pa is not None else ENCODING_JSON
+
+
+def shared_memory_name(prefix, source):
+    return f'{prefix}_{source}'
+
+
+class SnapshotPublisher:
+    """
+    Publishes the latest snapshot of each source into its own shared memory ring buffer.
+
+    There is one writer per source (this object). Every publish goes into the next slot of the ring and
+    only then bumps the 'latest' sequence number, so readers in other processes never need a lock, they just
+    re-check the slot sequence after reading (see SnapshotReader).
+
+    :param encoding: ENCODING_ARROW or ENCODING_JSON, defaults to Arrow when pyarrow is installed. Written into
+        the block header so readers pick the matching decoder.
+    :param encoder: custom callable(data) -> bytes instead of a built-in encoding, readers then need the decoder
+    """
+
+    def __init__(self, prefix='mds', sources=MARKET_DATA_SOURCES, slot_count=4, slot_size=2 ** 20,
+                 encoding=None, encoder=None):
+        self.prefix = prefix
+        self.slot_count = slot_count
+        self.slot_size = slot_size
+        self._blocks = dict()
+        # source -> skipped failed scrapes, the last good snapshot stays the newest one
+        self.failures = dict()
+
+        if encoder is not None:
+            self.encoding = ENCODING_CUSTOM
+            self._encode = lambda source, data: encoder(data)
+        else:
+            self.encoding = encoding if encoding is not None else default_encoding()
+            if self.encoding == ENCODING_ARROW:
+                missing = [source for source in sources if source not in snapshot_serialization.SCHEMAS]
+                if missing:
+                    raise ValueError(f'no Arrow schema for {missing}, use ENCODING_JSON')
+                self._encode = snapshot_serialization.encode_arrow
+            elif self.encoding == ENCODING_JSON:
+                self._encode = lambda source, data: _json_encode(data)
+            else:
+                raise ValueError(f'unknown encoding {self.encoding}')
+
+        block_size = _BLOCK_HEADER.size + (slot_count * (_SLOT_HEADER.size + slot_size))
+        for source in sources:
+            name = shared_memory_name(prefix, source)
+            try:
+                shm = shared_memory.SharedMemory(name=name, create=True, size=block_size)
+            except FileExistsError:
+                # Left over from a publisher that didn't shut down cleanly, take it over
+                shm = shared_memory.SharedMemory(name=name, create=False)
+                if shm.size < block_size:
+                    shm.close()
+                    shm.unlink()
+                    shm = shared_memory.SharedMemory(name=name, create=True, size=block_size)
+            _BLOCK_HEADER.pack_into(shm.buf, 0, _MAGIC, slot_count, slot_size, 0, self.encoding.encode(),
+                                    os.getpid())
+            self._blocks[source] = shm
+
+    def __str__(self):
+        return f'snapshot_publisher.SnapshotPublisher({self.prefix})'
+
+    def publish(self, source, data) -> int or bool:
+        """
+        Encode 'data' and write it into the next slot for 'source'.
+        :return: the sequence number of the published snapshot, False if it could not be published
+        """
+        shm = self._blocks.get(source)
+        if shm is None:
+            logging.error(f'{self.__str__()}.publish() - unknown source {source}')
+            return False
+
+        payload = self._encode(source, data)
+        if len(payload) > self.slot_size:
+            logging.error(f'{self.__str__()}.publish() - {source} snapshot is {len(payload)} bytes, '
+                          f'slot size is {self.slot_size}')
+            return False
+
+        buf = shm.buf
+        seq = struct.unpack_from('<Q', buf, _LATEST_SEQ_OFFSET)[0] + 1
+        offset = _BLOCK_HEADER.size + ((seq % self.slot_count) * (_SLOT_HEADER.size + self.slot_size))
+
+        # Mark the slot as being written (seq 0) so a lapped reader can't accept a half written payload
+        _SLOT_HEADER.pack_into(buf, offset, 0, 0.0, 0)
+        start = offset + _SLOT_HEADER.size
+        buf[start:start + len(payload)] = payload
+        _SLOT_HEADER.pack_into(buf, offset, seq, time.time(), len(payload))
+
+        # Commit
+        struct.pack_into('<Q', buf, _LATEST_SEQ_OFFSET, seq)
+        return seq
+
+    def publish_from(self, scraper, sources=None) -> dict:
+        """
+        Call each source method on 'scraper' and publish the result. Failed scrapes (False / None) aren't
+        published, readers keep getting the last good snapshot, and are counted in 'failures'.
+        :return: dict of source -> sequence number (False for the ones that failed)
+        """
+        if sources is None:
+            sources = self._blocks.keys()
+
+        published = dict()
+        for source in sources:
+            seq = False
+            try:
+                data = getattr(scraper, source)()
+                if data is False or data is None:
+                    self.failures[source] = self.failures.get(source, 0) + 1
+                    logging.warning(f'{self.__str__()}.publish_from() - {source} scrape failed, '
+                                    f'keeping the last snapshot')
+                else:
+                    seq = self.publish(source, data)
+            except Exception:
+                logging.exception(f'{self.__str__()}.publish_from() - ERROR on {source}',
+                                  exc_info=traceback.format_exc())
+            published[source] = seq
+        return published
+
+    def run(self, scraper, interval=60, sources=None):
+        """Publish every source forever. Keep the interval reasonable, these are free websites."""
+        while True:
+            start = time.time()
+            self.publish_from(scraper, sources)
+            time.sleep(max(0.0, interval - (time.time() - start)))
+
+    def close(self, unlink=True):
+        for shm in self._blocks.values():
+            shm.close()
+            if unlink:
+                shm.unlink()
+        self._blocks = dict()
+
+
+class SnapshotReader:
+    """
+    Lock-free reader for one source published by a SnapshotPublisher in another process.
+
+    The decoder comes from the encoding in the block header, 'decoder' is only needed for a custom encoder.
+    """
+
+    def __init__(self, source, prefix='mds', decoder=None, retries=8):
+        self.source = source
+        self._retries = retries
+        name = shared_memory_name(prefix, source)
+
+        if sys.version_info >= (3, 13):
+            self._shm = shared_memory.SharedMemory(name=name, create=False, track=False)
+        else:
+            self._shm = shared_memory.SharedMemory(name=name, create=False)
+
+        magic, self.slot_count, self.slot_size, _, encoding, publisher_pid = \
+            _BLOCK_HEADER.unpack_from(self._shm.buf, 0)
+        if magic != _MAGIC:
+            self._shm.close()
+            raise ValueError(f'{name} is not a snapshot block')
+        self.encoding = encoding.rstrip(b'\0').decode()
+
+        if sys.version_info < (3, 13):
+            # The publisher owns the block. Before 3.13 attaching registers it with the resource tracker, which
+            # would unlink it when this process exits, so stop tracking it here. Not when this process shares the
+            # publisher's tracker (same process, or a multiprocessing child), that would drop the publisher's own
+            # registration.
+            if publisher_pid != os.getpid() and multiprocessing.parent_process() is None:
+                try:
+                    resource_tracker.unregister(self._shm._name, 'shared_memory')
+                except Exception:
+                    pass
+
+        if decoder is not None:
+            self._decoder = decoder
+        elif self.encoding == ENCODING_ARROW:
+            self._decoder = _arrow_decode
+        elif self.encoding == ENCODING_JSON:
+            self._decoder = _json_decode
+        else:
+            self._shm.close()
+            raise ValueError(f'{name} uses a custom encoding, pass its decoder')
+
+    def __str__(self):
+        return f'snapshot_publisher.SnapshotReader({self.source})'
+
+    def latest_sequence(self) -> int:
+        return struct.unpack_from('<Q', self._shm.buf, _LATEST_SEQ_OFFSET)[0]
+
+    def _slot_offset(self, seq):
+        return _BLOCK_HEADER.size + ((seq % self.slot_count) * (_SLOT_HEADER.size + self.slot_size))
+
+    def is_current(self, seq) -> bool:
+        """True if the slot holding 'seq' hasn't been overwritten yet"""
+        return _SLOT_HEADER.unpack_from(self._shm.buf, self._slot_offset(seq))[0] == seq
+
+    def latest_view(self) -> tuple or bool:
+        """
+        Zero-copy access to the newest snapshot.
+        :return: (seq, timestamp, memoryview of the encoded payload), False if nothing is published yet.
+        The view points straight into shared memory, check is_current(seq) once done with it.
+        """
+        for _ in range(self._retries):
+            seq = self.latest_sequence()
+            if seq == 0:
+                return False
+            offset = self._slot_offset(seq)
+            slot_seq, ts, length = _SLOT_HEADER.unpack_from(self._shm.buf, offset)
+            if slot_seq != seq:
+                # Writer lapped us between reading 'latest' and the slot header
+                continue
+            start = offset + _SLOT_HEADER.size
+            return seq, ts, self._shm.buf[start:start + length]
+        return False
+
+    def latest_table(self) -> tuple or bool:
+        """
+        Zero-copy pyarrow.Table of the newest snapshot (Arrow encoding only).
+        :return: (seq, timestamp, table), False if nothing is published yet.
+        The table's columns point straight into shared memory, check is_current(seq) once done with it.
+        """
+        if self.encoding != ENCODING_ARROW:
+            raise ValueError(f'{self.source} is published as {self.encoding}, not arrow')
+        view = self.latest_view()
+        if view is False:
+            return False
+        seq, ts, payload = view
+        return seq, ts, snapshot_serialization.decode_arrow(payload)
+
+    def latest(self) -> tuple or bool:
+        """
+        Decoded copy of the newest snapshot.
+        :return: (seq, timestamp, data), False if nothing is published yet
+        """
+        for _ in range(self._retries):
+            view = self.latest_view()
+            if view is False:
+                return False
+            seq, ts, payload = view
+            decoded = False
+            try:
+                data = self._decoder(payload)
+                decoded = True
+            except Exception:
+                # Torn read, only possible if the writer overwrote the slot while decoding
+                pass
+            finally:
+                payload.release()
+            if decoded and self.is_current(seq):
+                return seq, ts, data
+        logging.error(f'{self.__str__()}.latest() - could not get a consistent read')
+        return False
+
+    def close(self):
+        self._shm.close()
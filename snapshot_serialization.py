@@ -0,0 +1,274 @@
+"""
+Binary encoders / decoders for the results of the MarketDataScraper and WatchlistAndSymbolsHelper get_* methods.
+
+Every source has a fixed, versioned column schema (SCHEMAS) so the bytes don't depend on which keys happened to be
+in a row. Both formats are columnar:
+    - Arrow IPC stream, decode_arrow() hands back a pyarrow.Table whose columns point straight into the payload.
+    - msgpack, one list per column, decode_msgpack() is a single unpackb() call.
+
+to_records() turns either back into the same shape the get_* method returned. A failed scrape (False / None) is
+encoded as an empty payload flagged 'failed' and comes back as False.
+
+pyarrow and msgpack are optional, only needed for their own format.
+"""
+import datetime
+
+from market_data_scraper import AnalystRating
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+SCHEMA_VERSION = 1
+
+# Result shapes
+KEYED = 'keyed'      # {symbol: {field: value}}
+ROWS = 'rows'        # [{field: value}]
+RECORD = 'record'    # {field: value}
+SCALAR = 'scalar'    # value
+VALUES = 'values'    # [value]
+
+_QUOTE_FIELDS = [
+    ('symbol', 'string'), ('name', 'string'), ('lastPrice', 'float64'), ('changeDollar', 'float64'),
+    ('changePercent', 'float64'), ('volume', 'int64'), ('avgVolumeThreeMonth', 'int64'), ('marketCap', 'string'),
+    ('peRatioTTM', 'float64'),
+]
+_INDEX_FIELDS = [
+    ('symbol', 'string'), ('name', 'string'), ('lastPrice', 'float64'), ('changeDollar', 'float64'),
+    ('changePercent', 'float64'), ('volume', 'int64'),
+]
+
+# source -> (shape, [(field, type)]). Never change a field in place, add a new one and bump SCHEMA_VERSION.
+SCHEMAS = {
+    'get_futures_data_yf': (KEYED, [
+        ('symbol', 'string'), ('name', 'string'), ('currentPrice', 'float64'), ('changeDollar', 'float64'),
+        ('changePercent', 'float64'), ('volumeText', 'string'), ('volume', 'float64'), ('openInterest', 'string'),
+    ]),
+    'get_trending_tickers_yf': (KEYED, [
+        ('symbol', 'string'), ('name', 'string'), ('lastPrice', 'float64'), ('marketTime', 'string'),
+        ('changeDollar', 'float64'), ('changePercent', 'float64'), ('volume', 'int64'),
+        ('avgVolumeThreeMonth', 'int64'),
+    ]),
+    'get_top_volume_tickers_yf': (KEYED, _QUOTE_FIELDS),
+    'get_top_gaining_tickers_yf': (KEYED, _QUOTE_FIELDS),
+    'get_top_losing_tickers_yf': (KEYED, _QUOTE_FIELDS),
+    'get_crypto_data_yf': (KEYED, [
+        ('symbol', 'string'), ('name', 'string'), ('lastPrice', 'float64'), ('changeDollar', 'float64'),
+        ('changePercent', 'float64'), ('marketCap', 'int64'), ('volumeSinceMidnight', 'int64'),
+        ('volumeLast24hr', 'int64'), ('volumeInCirculation', 'int64'),
+    ]),
+    'get_index_data_yf': (KEYED, _INDEX_FIELDS),
+    'get_vix_data': (RECORD, _INDEX_FIELDS),
+    'get_currencies_data_yf': (KEYED, [
+        ('symbol', 'string'), ('name', 'string'), ('base', 'string'), ('quote', 'string'),
+        ('lastPrice', 'float64'), ('changeDollar', 'float64'), ('changePercent', 'float64'),
+    ]),
+    'get_sp500_constituents': (KEYED, [
+        ('rank', 'int64'), ('company', 'string'), ('symbol', 'string'), ('weight', 'float64'), ('price', 'float64'),
+    ]),
+    'get_put_call_ratio_cboe': (RECORD, [
+        ('totalPutCallRatio', 'float64'), ('indexPutCallRatio', 'float64'), ('vixPutCallRatio', 'float64'),
+        ('majorExchangePutCallRatio', 'float64'),
+    ]),
+    'get_next_cpi_report_timestamp': (SCALAR, [('value', 'float64')]),
+    'get_next_retail_sales_report_timestamp': (SCALAR, [('value', 'float64')]),
+    'get_unusual_option_volume_marketbeat': (ROWS, [
+        ('ticker', 'string'), ('curStockPrice', 'float64'), ('stockPercentGain', 'float64'),
+        ('todaysOptionVolume', 'int64'), ('avgOptionVolume', 'int64'), ('relativeVolumeIncrease', 'float64'),
+        ('avgStockVolume', 'int64'), ('catalystEvents', 'list<string>'),
+    ]),
+    'get_analysts_upgrades_downgrades_marketwatch': (ROWS, [
+        ('date', 'date32'), ('ticker', 'string'), ('company', 'string'), ('rating', 'string'),
+        ('analyst', 'string'),
+    ]),
+}
+for _name in ('get_watchlist_yf_most_watched', 'get_watchlist_yf_biggest_52wk_gains',
+              'get_watchlist_yf_recent_52wk_highs', 'get_watchlist_yf_biggest_52wk_losses',
+              'get_watchlist_yf_most_shorted_stocks', 'get_watchlist_yf_most_newly_added',
+              'get_watchlist_yf_trending_tickers'):
+    SCHEMAS[_name] = (VALUES, [('symbol', 'string')])
+
+
+def _flatten_futures_row(row) -> dict:
+    # volume comes back as [raw text, number]
+    row = dict(row)
+    volume = row.get('volume')
+    if isinstance(volume, list):
+        row['volumeText'], row['volume'] = volume[0], volume[1]
+    return row
+
+
+def _unflatten_futures_row(row) -> dict:
+    row['volume'] = [row.pop('volumeText'), row['volume']]
+    return row
+
+
+_FLATTEN = {
+    'get_futures_data_yf': _flatten_futures_row,
+    'get_analysts_upgrades_downgrades_marketwatch': lambda record: record._asdict(),
+}
+_UNFLATTEN = {
+    'get_futures_data_yf': _unflatten_futures_row,
+    'get_analysts_upgrades_downgrades_marketwatch': lambda row: AnalystRating(**row),
+}
+
+
+def _cast(value, kind):
+    if value is None:
+        return None
+    try:
+        if kind == 'float64':
+            return float(value)
+        if kind == 'int64':
+            return int(value)
+        if kind == 'string':
+            return str(value)
+        if kind == 'list<string>':
+            return [str(v) for v in value]
+    except (TypeError, ValueError):
+        return None
+    return value
+
+
+def is_failed(data) -> bool:
+    """The get_* methods return False (a few None) when the scrape failed"""
+    return data is False or data is None
+
+
+def to_columns(source, data) -> list:
+    """
+    The result of 'source' as one list per schema field (same order as SCHEMAS), missing values are None.
+    A failed result is all empty columns.
+    """
+    shape, fields = SCHEMAS[source]
+    if is_failed(data):
+        return [list() for _ in fields]
+    if shape == KEYED:
+        rows = list(data.values())
+    elif shape == ROWS:
+        rows = list(data)
+    elif shape == RECORD:
+        rows = [data]
+    elif shape == SCALAR:
+        rows = [{'value': data}]
+    else:
+        rows = [{'symbol': v} for v in data]
+
+    flatten = _FLATTEN.get(source)
+    if flatten is not None:
+        rows = [flatten(row) for row in rows]
+
+    return [[_cast(row.get(field), kind) for row in rows] for field, kind in fields]
+
+
+def from_columns(source, columns):
+    """Inverse of to_columns(), rebuilds the shape the get_* method returns"""
+    shape, fields = SCHEMAS[source]
+    names = [field for field, _ in fields]
+
+    if shape == VALUES:
+        return list(columns[0])
+    if shape == SCALAR:
+        return columns[0][0] if len(columns[0]) > 0 else None
+
+    rows = [dict(zip(names, values)) for values in zip(*columns)]
+    unflatten = _UNFLATTEN.get(source)
+    if unflatten is not None:
+        rows = [unflatten(row) for row in rows]
+
+    if shape == KEYED:
+        key = 'symbol' if 'symbol' in names else names[0]
+        return {(row[key] if isinstance(row, dict) else getattr(row, key)): row for row in rows}
+    if shape == RECORD:
+        return rows[0] if len(rows) > 0 else None
+    return rows
+
+
+def _require(module, name):
+    if module is None:
+        raise ImportError(f'{name} is required for this format, pip install {name}')
+
+
+_ARROW_TYPES = {
+    'string': lambda: pa.string(),
+    'float64': lambda: pa.float64(),
+    'int64': lambda: pa.int64(),
+    'date32': lambda: pa.date32(),
+    'list<string>': lambda: pa.list_(pa.string()),
+}
+_arrow_schemas = dict()
+
+
+def arrow_schema(source):
+    """The pyarrow.Schema for 'source', built once"""
+    _require(pa, 'pyarrow')
+    if source not in _arrow_schemas:
+        shape, fields = SCHEMAS[source]
+        _arrow_schemas[source] = pa.schema(
+            [pa.field(field, _ARROW_TYPES[kind]()) for field, kind in fields],
+            metadata={'source': source, 'shape': shape, 'version': str(SCHEMA_VERSION)})
+    return _arrow_schemas[source]
+
+
+def encode_arrow(source, data) -> bytes:
+    """Arrow IPC stream (one record batch) of a get_* result"""
+    schema = arrow_schema(source)
+    if is_failed(data):
+        schema = schema.with_metadata({**schema.metadata, b'failed': b'1'})
+    arrays = [pa.array(column, type=field.type) for column, field in zip(to_columns(source, data), schema)]
+    batch = pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        writer.write_batch(batch)
+    return sink.getvalue().to_pybytes()
+
+
+def decode_arrow(payload):
+    """
+    pyarrow.Table view of an encode_arrow() payload. Zero-copy, the columns reference 'payload' directly so it
+    has to stay alive (and unchanged) while the table is in use.
+    """
+    _require(pa, 'pyarrow')
+    return pa.ipc.open_stream(pa.py_buffer(payload)).read_all()
+
+
+def encode_msgpack(source, data) -> bytes:
+    _require(msgpack, 'msgpack')
+    columns = to_columns(source, data)
+    for (field, kind), column in zip(SCHEMAS[source][1], columns):
+        if kind == 'date32':
+            column[:] = [d.toordinal() if d is not None else None for d in column]
+    return msgpack.packb({'source': source, 'version': SCHEMA_VERSION, 'failed': is_failed(data), 'columns': columns},
+                         use_bin_type=True)
+
+
+def decode_msgpack(payload) -> dict:
+    """{'source', 'version', 'failed', 'columns'} straight from one unpackb() call"""
+    _require(msgpack, 'msgpack')
+    return msgpack.unpackb(payload, raw=False)
+
+
+def to_records(decoded):
+    """Rebuild the get_* result from decode_arrow() or decode_msgpack() output, False if the scrape had failed"""
+    if isinstance(decoded, dict):
+        if decoded.get('failed'):
+            return False
+        source = decoded['source']
+        columns = decoded['columns']
+        for n, (field, kind) in enumerate(SCHEMAS[source][1]):
+            if kind == 'date32':
+                columns[n] = [datetime.date.fromordinal(d) if d is not None else None for d in columns[n]]
+        return from_columns(source, columns)
+
+    if decoded.schema.metadata.get(b'failed') == b'1':
+        return False
+    source = decoded.schema.metadata[b'source'].decode()
+    return from_columns(source, [column.to_pylist() for column in decoded.columns])
@@ -0,0 +1,296 @@
+"""
+Local read-through HTTP/JSON server for the MarketDataScraper and WatchlistAndSymbolsHelper sources.
+
+One background thread per upstream page refreshes it every interval, serializes the result once (plain and
+gzipped) and swaps it in. Sources that are just a view of another source's page (DERIVED_SOURCES) are built from
+that result instead of fetching it again. Requests are only ever served from that cache, so any number of internal
+apps can poll it without the upstream websites seeing more than one request per page per interval.
+
+    GET /                           list of endpoints
+    GET /market/<source>            e.g. /market/get_top_gaining_tickers_yf
+    GET /watchlist/<source>         e.g. /watchlist/get_watchlist_yf_most_watched
+    GET /health
+
+Responses carry an ETag (the gzipped variant has its own), send it back in If-None-Match to get a 304 when nothing
+changed.
+
+    python snapshot_server.py --port 8080
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import threading
+import time
+import traceback
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from collection_coordinator import DEFAULT_INTERVALS
+from market_data_scraper import MarketDataScraper, WatchlistAndSymbolsHelper, MARKET_DATA_SOURCES, \
+    WATCHLIST_SOURCES
+
+
+# endpoint -> (endpoint whose result it's built from, function building it). Only for exact views, the trending
+# watchlist isn't one (get_trending_tickers_yf() also drops futures / index symbols the watchlist keeps).
+DERIVED_SOURCES = {
+    '/market/get_vix_data': ('/market/get_index_data_yf', lambda indices: indices['^VIX']),
+}
+
+
+class CachedSnapshot:
+    """One pre-serialized response, only 'fetched' changes after it's built"""
+
+    __slots__ = ('body', 'gzip_body', 'etag', 'gzip_etag', 'fetched', 'max_age')
+
+    def __init__(self, data, fetched, max_age):
+        self.body = json.dumps(data, default=str, separators=(',', ':')).encode('utf-8')
+        self.gzip_body = gzip.compress(self.body, compresslevel=6)
+        digest = hashlib.blake2b(self.body, digest_size=12).hexdigest()
+        # Strong ETags are per representation, the gzipped bytes need their own
+        self.etag = f'"{digest}"'
+        self.gzip_etag = f'"{digest}-gz"'
+        self.fetched = fetched
+        self.max_age = max_age
+
+
+class SourceRefresher:
+    """
+    Keeps one source's CachedSnapshot current from a background thread. Refreshers made with derive() have no
+    thread of their own, they're rebuilt from this one's result every time it refreshes.
+    """
+
+    def __init__(self, name, fetch, interval, retry_interval=30):
+        self.name = name
+        self.interval = interval
+        self.retry_interval = min(retry_interval, interval)
+        self.snapshot = None
+        self.errors = 0
+        self.derived = list()
+        self._fetch = fetch
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __str__(self):
+        return f'snapshot_server.SourceRefresher({self.name})'
+
+    def refresh(self) -> bool:
+        try:
+            data = self._fetch()
+        except Exception:
+            logging.exception(f'{self.__str__()}.refresh() - ERROR', exc_info=traceback.format_exc())
+            data = False
+
+        if data is False or data is None:
+            # Keep serving the last good snapshot
+            self._failed()
+            return False
+
+        self.publish(data)
+        return True
+
+    def derive(self, name, build):
+        """New refresher for 'name', built as build(result) from every result of this one"""
+        refresher = SourceRefresher(name, None, self.interval, self.retry_interval)
+        self.derived.append((refresher, build))
+        return refresher
+
+    def _failed(self):
+        self.errors += 1
+        for refresher, _ in self.derived:
+            refresher._failed()
+
+    def publish(self, data):
+        snapshot = CachedSnapshot(data, time.time(), self.interval)
+        if self.snapshot is not None and snapshot.etag == self.snapshot.etag:
+            # Same body, keep the old object (and its ETags) so clients keep getting 304s
+            self.snapshot.fetched = snapshot.fetched
+        else:
+            self.snapshot = snapshot
+
+        for refresher, build in self.derived:
+            try:
+                derived = build(data)
+            except Exception:
+                logging.exception(f'{refresher.__str__()}.publish() - ERROR', exc_info=traceback.format_exc())
+                refresher._failed()
+                continue
+            refresher.publish(derived)
+
+    def start(self):
+        if self._fetch is None:
+            return
+
+        def loop():
+            while not self._stop.is_set():
+                ok = self.refresh()
+                self._stop.wait(self.interval if ok else self.retry_interval)
+
+        self._thread = threading.Thread(target=loop, name=f'refresh-{self.name}', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+
+def accepts_gzip(accept_encoding) -> bool:
+    """Whether an Accept-Encoding header allows gzip, honouring q=0"""
+    wildcard = False
+    for coding in accept_encoding.split(','):
+        name, _, params = coding.partition(';')
+        name = name.strip().lower()
+        q = 1.0
+        for param in params.split(';'):
+            key, _, value = param.partition('=')
+            if key.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if name in ('gzip', 'x-gzip'):
+            return q > 0
+        if name == '*':
+            wildcard = q > 0
+    return wildcard
+
+
+class SnapshotRequestHandler(BaseHTTPRequestHandler):
+    # Keep-alive, clients polling at high rates shouldn't pay for a new connection every time
+    protocol_version = 'HTTP/1.1'
+    server_version = 'market-data-snapshots/1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b'', headers=None):
+        self.send_response(status)
+        for key, value in (headers or dict()).items():
+            self.send_header(key, value)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if body and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _send_json(self, status, data):
+        self._send(status, json.dumps(data).encode('utf-8'), {'Content-Type': 'application/json'})
+
+    def do_HEAD(self):
+        self.do_GET()
+
+    def do_GET(self):
+        path = self.path.split('?', 1)[0].rstrip('/')
+        refreshers = self.server.refreshers
+
+        if path == '':
+            self._send_json(200, {'endpoints': sorted(refreshers.keys())})
+            return
+        if path == '/health':
+            self._send_json(200, {
+                name: {'ready': r.snapshot is not None, 'errors': r.errors,
+                       'fetched': r.snapshot.fetched if r.snapshot is not None else None}
+                for name, r in refreshers.items()})
+            return
+
+        refresher = refreshers.get(path)
+        if refresher is None:
+            self._send_json(404, {'error': f'unknown endpoint {path}'})
+            return
+
+        snapshot = refresher.snapshot
+        if snapshot is None:
+            self._send_json(503, {'error': 'not fetched yet'})
+            return
+
+        use_gzip = accepts_gzip(self.headers.get('Accept-Encoding', ''))
+        etag = snapshot.gzip_etag if use_gzip else snapshot.etag
+        headers = {
+            'ETag': etag,
+            'Vary': 'Accept-Encoding',
+            # Only as long as this snapshot has left before the next refresh
+            'Cache-Control': f'max-age={max(0, int(snapshot.max_age - (time.time() - snapshot.fetched)))}',
+            'X-Fetched-At': f'{snapshot.fetched:.3f}',
+        }
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            # Weak comparison, as If-None-Match calls for
+            tags = [tag.strip().removeprefix('W/') for tag in if_none_match.split(',')]
+            if etag in tags or '*' in tags:
+                self._send(304, headers=headers)
+                return
+
+        headers['Content-Type'] = 'application/json'
+        if use_gzip:
+            headers['Content-Encoding'] = 'gzip'
+            self._send(200, snapshot.gzip_body, headers)
+        else:
+            self._send(200, snapshot.body, headers)
+
+
+class SnapshotServer(ThreadingHTTPServer):
+    """
+    ThreadingHTTPServer serving the cached snapshots.
+
+    :param market_sources: MarketDataScraper methods to serve, defaults to MARKET_DATA_SOURCES
+    :param watchlist_sources: WatchlistAndSymbolsHelper methods to serve, defaults to WATCHLIST_SOURCES
+    :param intervals: refresh interval per source, defaults to collection_coordinator.DEFAULT_INTERVALS
+    """
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address=('127.0.0.1', 8080), market_sources=MARKET_DATA_SOURCES,
+                 watchlist_sources=WATCHLIST_SOURCES, intervals=None):
+        super().__init__(address, SnapshotRequestHandler)
+        intervals = intervals if intervals is not None else DEFAULT_INTERVALS
+
+        sources = [(f'/market/{name}', name, MarketDataScraper, 60) for name in market_sources]
+        sources += [(f'/watchlist/{name}', name, WatchlistAndSymbolsHelper, 60 * 15) for name in watchlist_sources]
+        served = {endpoint for endpoint, _, _, _ in sources}
+
+        # Each refresher gets its own scraper, their memo / session state isn't shared across threads
+        self.refreshers = dict()
+        derived = list()
+        for endpoint, name, target, default_interval in sources:
+            if endpoint in DERIVED_SOURCES and DERIVED_SOURCES[endpoint][0] in served:
+                # Built from a page that's fetched anyway
+                derived.append((endpoint, name))
+                continue
+            fetch = getattr(target(), name)
+            self.refreshers[endpoint] = SourceRefresher(name, fetch, intervals.get(name, default_interval))
+
+        for endpoint, name in derived:
+            base, build = DERIVED_SOURCES[endpoint]
+            self.refreshers[endpoint] = self.refreshers[base].derive(name, build)
+
+    def start_refreshers(self):
+        for refresher in self.refreshers.values():
+            refresher.start()
+
+    def server_close(self):
+        for refresher in self.refreshers.values():
+            refresher.stop()
+        super().server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    server = SnapshotServer((args.host, args.port))
+    server.start_refreshers()
+    print(f'Serving market data snapshots on http://{args.host}:{args.port}/')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
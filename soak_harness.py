@@ -0,0 +1,232 @@
+"""
+Soak test for the scrapers. Replays recorded pages through every MarketDataScraper / WatchlistAndSymbolsHelper
+source for thousands of cycles and tracks RSS + tracemalloc over time. Exits 1 if memory grows past the budget, or
+if any source fails after the warmup (a source that isn't parsing anything makes the memory numbers meaningless).
+
+Record the fixtures once (hits the real websites, one request per page):
+    python soak_harness.py --record
+
+Then soak against them as often as you like (no network):
+    python soak_harness.py --cycles 5000 --rss-budget-mb 20
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import resource
+import sys
+import time
+import tracemalloc
+import urllib.parse
+
+import requests
+
+from market_data_scraper import MarketDataScraper, WatchlistAndSymbolsHelper, MARKET_DATA_SOURCES, \
+    WATCHLIST_SOURCES
+
+
+class RecordingSession(requests.Session):
+    """Real session that also writes every response body into the fixture directory"""
+
+    def __init__(self, fixture_dir):
+        super().__init__()
+        self.fixture_dir = fixture_dir
+
+    def get(self, url, **kwargs):
+        response = super().get(url, **kwargs)
+        with open(fixture_path(self.fixture_dir, url), 'wb') as f:
+            f.write(response.content)
+        return response
+
+
+class ReplayResponse:
+
+    def __init__(self, content):
+        self.content = content
+        self.status_code = 200
+
+
+class ReplaySession:
+    """Stands in for requests.Session, serves the recorded page for each url"""
+
+    def __init__(self, fixture_dir):
+        self.fixture_dir = fixture_dir
+        self.headers = dict()
+        self._pages = dict()
+
+    def get(self, url, **kwargs):
+        if url not in self._pages:
+            with open(fixture_path(self.fixture_dir, url), 'rb') as f:
+                self._pages[url] = f.read()
+        return ReplayResponse(self._pages[url])
+
+
+def fixture_path(fixture_dir, url):
+    return os.path.join(fixture_dir, urllib.parse.quote(url, safe='') + '.html')
+
+
+def current_rss_bytes() -> int:
+    """Current resident set size, falls back to the peak where /proc isn't available"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def build_scrapers(session_factory):
+    scraper = MarketDataScraper()
+    scraper._session = session_factory()
+    # Replayed pages are from whenever they were recorded, always go through the parsers
+    scraper.session_calendar = None
+
+    helper = WatchlistAndSymbolsHelper()
+    helper.session_firefox = session_factory()
+    return scraper, helper
+
+
+def run_sources(scraper, helper) -> dict:
+    """One scrape cycle over every source, returns source -> error count (0 or 1)"""
+    errors = dict()
+    for name in MARKET_DATA_SOURCES + ('get_analysts_upgrades_downgrades_marketwatch',):
+        errors[name] = _call(scraper, name)
+    for name in WATCHLIST_SOURCES:
+        errors[name] = _call(helper, name)
+    return errors
+
+
+def _call(obj, name) -> int:
+    try:
+        # Some sources print their results
+        with contextlib.redirect_stdout(io.StringIO()):
+            data = getattr(obj, name)()
+    except Exception:
+        return 1
+    # Most sources swallow fetch / parse errors and return False
+    return 1 if data is False or data is None else 0
+
+
+def record(fixture_dir):
+    os.makedirs(fixture_dir, exist_ok=True)
+    scraper, helper = build_scrapers(lambda: RecordingSession(fixture_dir))
+    helper.session_firefox.headers.update(WatchlistAndSymbolsHelper().session_firefox.headers)
+    errors = run_sources(scraper, helper)
+    for name, failed in errors.items():
+        print(f'{"FAILED" if failed else "ok":>6}  {name}')
+
+
+def soak(args) -> bool:
+    scraper, helper = build_scrapers(lambda: ReplaySession(args.fixture_dir))
+
+    tracemalloc.start(args.trace_depth)
+    samples = list()
+    error_counts = dict()
+    late_error_counts = dict()
+    baseline = None
+    baseline_rss = None
+    baseline_heap = None
+    start = time.time()
+
+    for cycle in range(1, args.cycles + 1):
+        if args.parse_every_cycle:
+            scraper._parse_memo.clear()
+            scraper._analyst_fingerprint = None
+            scraper.analyst_watermark = None
+
+        for name, failed in run_sources(scraper, helper).items():
+            error_counts[name] = error_counts.get(name, 0) + failed
+            if cycle > args.warmup:
+                late_error_counts[name] = late_error_counts.get(name, 0) + failed
+
+        if cycle == args.warmup:
+            baseline = tracemalloc.take_snapshot()
+            baseline_rss = current_rss_bytes()
+            baseline_heap = tracemalloc.get_traced_memory()[0]
+
+        if cycle % args.sample_every == 0 or cycle == args.cycles:
+            rss = current_rss_bytes()
+            heap, heap_peak = tracemalloc.get_traced_memory()
+            samples.append({'cycle': cycle, 'elapsed': time.time() - start, 'rss': rss, 'heap': heap,
+                            'heapPeak': heap_peak})
+            print(f'cycle {cycle:>7}  rss {rss / 2 ** 20:8.1f}MB  heap {heap / 2 ** 20:8.1f}MB  '
+                  f'peak {heap_peak / 2 ** 20:8.1f}MB')
+
+    top = list()
+    if baseline is not None:
+        stats = tracemalloc.take_snapshot().compare_to(baseline, 'traceback')
+        for stat in stats[:args.top]:
+            top.append({'sizeDiff': stat.size_diff, 'countDiff': stat.count_diff,
+                        'traceback': stat.traceback.format()})
+    tracemalloc.stop()
+
+    memory_ok = True
+    if baseline is None:
+        print(f'Only ran {args.cycles} cycles, need more than --warmup ({args.warmup}) to measure growth')
+    else:
+        rss_growth = samples[-1]['rss'] - baseline_rss
+        heap_growth = samples[-1]['heap'] - baseline_heap
+        print(f'\nGrowth after warmup: rss {rss_growth / 2 ** 20:.2f}MB (budget {args.rss_budget_mb}MB), '
+              f'heap {heap_growth / 2 ** 20:.2f}MB (budget {args.heap_budget_mb}MB)')
+        memory_ok = rss_growth <= args.rss_budget_mb * 2 ** 20 and heap_growth <= args.heap_budget_mb * 2 ** 20
+
+        print(f'\nTop {args.top} allocators since warmup:')
+        for t in top:
+            print(f'{t["sizeDiff"] / 1024:+10.1f}KB {t["countDiff"]:+8d} blocks  {t["traceback"][0].strip()}')
+
+    failing = {name: n for name, n in error_counts.items() if n}
+    if failing:
+        print(f'\nSources with errors (missing fixture or page layout changed): {failing}')
+
+    # Any error after warmup fails the run, with no warmup baseline a source that never worked does
+    never_ok = [name for name, n in error_counts.items() if n == args.cycles]
+    late_failing = [name for name, n in late_error_counts.items() if n]
+    sources_ok = not late_failing and not never_ok
+    passed = memory_ok and sources_ok
+
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump({'passed': passed, 'memoryOk': memory_ok, 'sourcesOk': sources_ok, 'samples': samples,
+                       'topAllocators': top, 'errors': error_counts}, f, indent=2)
+
+    if passed:
+        print('\nPASSED')
+    else:
+        reasons = list()
+        if not memory_ok:
+            reasons.append('memory growth over budget')
+        if not sources_ok:
+            reasons.append(f'sources failing: {sorted(set(late_failing + never_ok))}')
+        print(f'\nFAILED: {"; ".join(reasons)}')
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fixture-dir', default='soak_fixtures')
+    parser.add_argument('--record', action='store_true', help='fetch every page once and save it as a fixture')
+    parser.add_argument('--cycles', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=50, help='cycles before the baseline is taken')
+    parser.add_argument('--sample-every', type=int, default=100)
+    parser.add_argument('--rss-budget-mb', type=float, default=16.0)
+    parser.add_argument('--heap-budget-mb', type=float, default=4.0)
+    parser.add_argument('--top', type=int, default=10, help='number of top allocators to report')
+    parser.add_argument('--trace-depth', type=int, default=8)
+    parser.add_argument('--memoize', dest='parse_every_cycle', action='store_false',
+                        help='let the parse memo serve repeat pages instead of re-parsing every cycle')
+    parser.add_argument('--report', help='write samples and top allocators to this json file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.CRITICAL)
+
+    if args.record:
+        record(args.fixture_dir)
+        return
+
+    sys.exit(0 if soak(args) else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+import numpy as np
+import pandas as pd
+
+from market_data_scraper import BulkQuoteFetcher
+
+
+class StandInTransport:
+    """Serves daily bars up to 'today' out of a fixed calendar, records every call"""
+
+    def __init__(self):
+        self.days = pd.bdate_range('2026-01-01', '2026-10-16', tz='America/New_York')
+        self.today = 5
+        self.calls = list()
+
+    def __call__(self, symbols, interval, period=None, start=None):
+        self.calls.append((tuple(symbols), period, start))
+        index = self.days[:self.today]
+        if start is not None:
+            index = index[index >= start]
+        close = np.arange(len(index), dtype=float) + self.today
+        return {sym: pd.DataFrame({'Close': close, 'Volume': 100}, index=index) for sym in symbols}
+
+
+def test_cold_symbols_are_fetched_in_chunks(tmp_path):
+    transport = StandInTransport()
+    fetcher = BulkQuoteFetcher(cache_dir=str(tmp_path), chunk_size=2, transport=transport)
+    history = fetcher.get_history(['A', 'B', 'C', 'A'], period='5d')
+
+    assert sorted(history) == ['A', 'B', 'C']
+    assert sorted(len(symbols) for symbols, _, _ in transport.calls) == [1, 2]
+    assert all(start is None for _, _, start in transport.calls)
+
+
+def test_warm_symbols_only_fetch_the_tail(tmp_path):
+    transport = StandInTransport()
+    fetcher = BulkQuoteFetcher(cache_dir=str(tmp_path), transport=transport)
+    fetcher.get_history(['A'], period='5d')
+
+    transport.today += 1
+    transport.calls.clear()
+    history = fetcher.get_history(['A'], period='5d')
+
+    (_, _, start), = transport.calls
+    assert start == transport.days[4]
+    assert history['A'].index[-1] == transport.days[5]
+
+
+def test_refresh_false_skips_the_transport(tmp_path):
+    transport = StandInTransport()
+    fetcher = BulkQuoteFetcher(cache_dir=str(tmp_path), transport=transport)
+    fetcher.get_history(['A'], period='5d')
+    transport.calls.clear()
+
+    assert len(fetcher.get_history(['A'], period='5d', refresh=False)['A']) == 5
+    assert transport.calls == []
+
+
+def test_cache_is_trimmed_to_the_period(tmp_path):
+    transport = StandInTransport()
+    fetcher = BulkQuoteFetcher(cache_dir=str(tmp_path), transport=transport)
+    for _ in range(30):
+        transport.today += 1
+        history = fetcher.get_history(['A'], period='5d')
+
+    assert len(history['A']) == 5
+    assert history['A'].index[-1] == transport.days[transport.today - 1]
+    assert len(pd.read_pickle(fetcher._cache_path('A', '1d', '5d'))) == 5
+
+
+def test_trim_to_period():
+    frame = pd.DataFrame({'a': 1}, index=pd.bdate_range('2026-01-01', '2026-10-16'))
+    assert len(BulkQuoteFetcher._trim_to_period(frame, '2d')) == 2
+    assert BulkQuoteFetcher._trim_to_period(frame, '1mo').index[0] > pd.Timestamp('2026-09-16')
+    assert len(BulkQuoteFetcher._trim_to_period(frame, 'max')) == len(frame)
+
+
+def test_quotes_from_daily_bars(tmp_path):
+    transport = StandInTransport()
+    fetcher = BulkQuoteFetcher(cache_dir=str(tmp_path), transport=transport)
+    quote = fetcher.get_quotes(['A'])['A']
+
+    assert quote['lastPrice'] == 9.0
+    assert quote['changeDollar'] == 1.0
+    assert quote['volume'] == 100
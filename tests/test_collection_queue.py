@@ -0,0 +1,122 @@
+import time
+
+import pytest
+
+from collection_coordinator import CollectionWorker, SqliteCollectionQueue, SOURCE_REQUESTS
+
+
+@pytest.fixture
+def queue_path(tmp_path):
+    return str(tmp_path / 'collection.sqlite3')
+
+
+@pytest.fixture
+def queue(queue_path):
+    queue = SqliteCollectionQueue(queue_path, worker_timeout=30)
+    queue.register_tasks({f'market:task{i}': 60 for i in range(6)})
+    return queue
+
+
+def test_tasks_are_shared_fairly(queue):
+    first = queue.claim('w1', 60)
+    assert len(first) == 6
+
+    # A second worker joins, w1 hands back half on its next claim and w2 takes them
+    queue.heartbeat('w2')
+    queue.claim('w1', 60)
+    second = queue.claim('w2', 60)
+    assignments = queue.assignments()
+    assert len(second) == 3
+    assert sorted(assignments.values()) == ['w1'] * 3 + ['w2'] * 3
+
+
+def test_expired_leases_are_taken_over(queue):
+    queue.claim('w1', 0.05)
+    time.sleep(0.1)
+    # w1 is still heartbeating, so w2 only takes its share of the expired tasks
+    taken = queue.claim('w2', 60)
+    assert len(taken) == 3
+    assert queue.complete('w1', taken[0], {'late': True}) is False
+
+
+def test_heartbeat_renews_leases(queue):
+    queue.claim('w1', 0.2)
+    time.sleep(0.1)
+    queue.heartbeat('w1', 0.5)
+    time.sleep(0.2)
+    assert queue.claim('w2', 60) == []
+
+
+def test_reap_frees_dead_workers_tasks(queue):
+    queue.claim('w1', 60)
+    assert queue.reap(worker_timeout=-1) == ['w1']
+    assert set(queue.assignments().values()) == {None}
+
+
+def test_complete_schedules_the_next_run(queue):
+    queue.claim('w1', 60)
+    assert queue.complete('w1', 'market:task0', {'a': 1}) is True
+    assert 'market:task0' not in queue.claim('w1', 60)
+    fetched, worker_id, data = queue.latest('market:task0')
+    assert (worker_id, data) == ('w1', {'a': 1})
+
+
+def test_failed_fetch_keeps_the_last_result(queue):
+    queue.claim('w1', 60)
+    queue.complete('w1', 'market:task0', {'a': 1})
+    queue.complete('w1', 'market:task0', False)
+    queue.complete('w1', 'market:task0', False)
+    assert queue.latest('market:task0')[2] == {'a': 1}
+    assert queue.error_count('market:task0') == 2
+
+    queue.complete('w1', 'market:task0', {'a': 2})
+    assert queue.latest('market:task0')[2] == {'a': 2}
+    assert queue.error_count('market:task0') == 0
+
+
+def test_token_bucket(queue):
+    queue.set_host_budget('example.com', 1.0, 2)
+    assert queue.acquire_host_token('example.com') == 0
+    assert queue.acquire_host_token('example.com') == 0
+    assert queue.acquire_host_token('example.com') == pytest.approx(1.0, abs=0.05)
+
+
+def test_token_bucket_weighted_requests(queue):
+    queue.set_host_budget('example.com', 1.0, 2)
+    assert queue.acquire_host_token('example.com', 2) == 0
+    assert queue.acquire_host_token('example.com', 2) == pytest.approx(2.0, abs=0.05)
+    # More than the burst is capped so it can still be granted
+    assert queue.acquire_host_token('example.com', 5) == pytest.approx(2.0, abs=0.05)
+
+
+def test_unknown_host_is_unthrottled(queue):
+    assert queue.acquire_host_token('unknown.example.com') == 0
+
+
+def test_budget_is_shared_across_connections(queue, queue_path):
+    queue.set_host_budget('example.com', 0.01, 1)
+    other = SqliteCollectionQueue(queue_path)
+    assert queue.acquire_host_token('example.com') == 0
+    assert other.acquire_host_token('example.com') > 0
+
+
+def test_worker_runs_due_tasks_and_charges_per_request(queue, monkeypatch):
+    charged = list()
+    monkeypatch.setattr(queue, 'acquire_host_token', lambda host, tokens=1: charged.append((host, tokens)) or 0)
+    queue.register_tasks({'market:get_unusual_option_volume_marketbeat': 60})
+
+    worker = CollectionWorker(queue, worker_id='w1', max_tasks_per_round=None)
+    target = worker._targets['market']
+    monkeypatch.setattr(target, 'get_unusual_option_volume_marketbeat', lambda: [{'ticker': 'AAA'}], raising=False)
+
+    assert worker.run_task('market:get_unusual_option_volume_marketbeat') is False     # not claimed yet
+    queue.claim('w1', 60)
+    assert worker.run_task('market:get_unusual_option_volume_marketbeat') is True
+    assert charged[-1] == ('www.marketbeat.com', SOURCE_REQUESTS['get_unusual_option_volume_marketbeat'])
+    assert queue.latest('market:get_unusual_option_volume_marketbeat')[2] == [{'ticker': 'AAA'}]
+
+
+def test_worker_caps_tasks_per_round(queue, monkeypatch):
+    worker = CollectionWorker(queue, worker_id='w1', max_tasks_per_round=2)
+    monkeypatch.setattr(worker, 'run_task', lambda task: True)
+    assert len(worker.run_once()) == 2
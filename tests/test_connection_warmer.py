@@ -0,0 +1,133 @@
+import shutil
+import socket
+import ssl
+import subprocess
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from market_data_scraper import ConnectionWarmer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        body = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _TlsServer(ThreadingHTTPServer):
+    """Local TLS 1.3 stand-in that keeps track of every connection it accepted"""
+
+    daemon_threads = True
+
+    def __init__(self, context):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.socket = context.wrap_socket(self.socket, server_side=True)
+        self.accepted = list()
+
+    def get_request(self):
+        request = super().get_request()
+        self.accepted.append(request[0])
+        return request
+
+    def drop_connections(self):
+        for sock in self.accepted:
+            try:
+                sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+
+@pytest.fixture(scope='module')
+def certificate(tmp_path_factory):
+    if shutil.which('openssl') is None:
+        pytest.skip('openssl is needed to make the test certificate')
+    directory = tmp_path_factory.mktemp('tls')
+    cert, key = str(directory / 'cert.pem'), str(directory / 'key.pem')
+    subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=localhost',
+                    '-addext', 'subjectAltName=DNS:localhost,IP:127.0.0.1', '-keyout', key, '-out', cert],
+                   check=True, capture_output=True)
+    return cert, key
+
+
+@pytest.fixture
+def server(certificate):
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.minimum_version = ssl.TLSVersion.TLSv1_3
+    context.load_cert_chain(*certificate)
+    server = _TlsServer(context)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def session(certificate, monkeypatch):
+    # These would win over session.verify
+    monkeypatch.delenv('REQUESTS_CA_BUNDLE', raising=False)
+    monkeypatch.delenv('CURL_CA_BUNDLE', raising=False)
+    session = requests.Session()
+    session.verify = certificate[0]
+    yield session
+    session.close()
+
+
+def _origin(server):
+    return f'https://localhost:{server.server_address[1]}'
+
+
+def test_warm_up_opens_the_whole_pool(server, session):
+    origin = _origin(server)
+    warmer = ConnectionWarmer(session, {origin: 3})
+    stats = warmer.warm_up()[origin]
+
+    assert stats['connected'] == 3
+    assert stats['errors'] == 0
+    assert len(server.accepted) == 3
+
+
+def test_requests_reuse_the_warmed_connections(server, session):
+    origin = _origin(server)
+    ConnectionWarmer(session, {origin: 2}).warm_up()
+
+    for _ in range(4):
+        assert session.get(f'{origin}/').text == 'ok'
+    # No new handshakes, the TLS 1.3 session tickets were read off during warm up
+    assert len(server.accepted) == 2
+
+
+def test_refresh_reconnects_dropped_connections(server, session):
+    origin = _origin(server)
+    warmer = ConnectionWarmer(session, {origin: 2})
+    warmer.warm_up()
+
+    assert warmer.refresh()[origin]['connected'] == 0
+
+    server.drop_connections()
+    stats = warmer.refresh()[origin]
+    assert stats['connected'] == 2
+    assert len(server.accepted) == 4
+    assert session.get(f'{origin}/').text == 'ok'
+    assert len(server.accepted) == 4
+
+
+def test_untrusted_certificate_counts_as_an_error(server, monkeypatch):
+    monkeypatch.delenv('REQUESTS_CA_BUNDLE', raising=False)
+    monkeypatch.delenv('CURL_CA_BUNDLE', raising=False)
+    origin = _origin(server)
+    with requests.Session() as session:
+        stats = ConnectionWarmer(session, {origin: 1}).warm_up()[origin]
+    assert stats['connected'] == 0
+    assert stats['errors'] == 1
@@ -0,0 +1,72 @@
+import random
+
+import numpy as np
+import pytest
+
+from market_data_scraper import FxRateMatrix, parse_currency_pair
+
+PAIRS = [
+    ('EUR', 'USD', 1.08), ('GBP', 'USD', 1.27), ('USD', 'JPY', 150.0), ('USD', 'CHF', 0.88),
+    ('AUD', 'USD', 0.66), ('EUR', 'JPY', 163.0),
+    # Only quoted through crosses
+    ('EUR', 'SEK', 11.5), ('SEK', 'NOK', 0.98),
+]
+
+
+def test_triangulated_rates():
+    matrix = FxRateMatrix(PAIRS)
+    assert matrix.rate('EUR', 'USD') == pytest.approx(1.08)
+    assert matrix.rate('USD', 'EUR') == pytest.approx(1 / 1.08)
+    assert matrix.rate('GBP', 'CHF') == pytest.approx(1.27 * 0.88)
+    assert matrix.rate('NOK', 'USD') == pytest.approx(1.08 / (11.5 * 0.98))
+    assert np.allclose(np.diag(matrix.rates), 1.0)
+
+
+def test_direct_crosses_override_triangulation():
+    matrix = FxRateMatrix(PAIRS)
+    assert matrix.rate('EUR', 'JPY') == 163.0
+    assert matrix.rate('JPY', 'EUR') == pytest.approx(1 / 163.0)
+
+
+def test_incremental_updates_match_a_rebuild():
+    rng = random.Random(0)
+    quotes = {(base, quote): rate for base, quote, rate in PAIRS}
+    matrix = FxRateMatrix(PAIRS)
+
+    for _ in range(200):
+        moved = rng.sample(sorted(quotes), rng.randint(1, 3))
+        update = [(base, quote, quotes[(base, quote)] * rng.uniform(0.98, 1.02)) for base, quote in moved]
+        for base, quote, rate in update:
+            quotes[(base, quote)] = rate
+        assert matrix.update(update) == len(update)
+
+        rebuilt = FxRateMatrix([(base, quote, rate) for (base, quote), rate in quotes.items()])
+        assert matrix.codes.tolist() == rebuilt.codes.tolist()
+        assert np.allclose(matrix.rates, rebuilt.rates)
+
+
+def test_unchanged_quotes_are_skipped():
+    matrix = FxRateMatrix(PAIRS)
+    assert matrix.update([('EUR', 'USD', 1.08)]) == 0
+
+
+def test_new_currency_rebuilds():
+    matrix = FxRateMatrix(PAIRS)
+    matrix.update([('USD', 'MXN', 17.0)])
+    assert matrix.rate('EUR', 'MXN') == pytest.approx(1.08 * 17.0)
+
+
+def test_convert():
+    matrix = FxRateMatrix(PAIRS)
+    converted = matrix.convert([100.0, 150.0], ['EUR', 'JPY'], 'USD')
+    assert converted == pytest.approx([108.0, 1.0])
+    with pytest.raises(KeyError):
+        matrix.convert([1.0], ['XXX'], 'USD')
+
+
+def test_parse_currency_pair():
+    assert parse_currency_pair('EURUSD=X', 'EUR/USD') == ('EUR', 'USD')
+    assert parse_currency_pair('JPY=X', 'USD/JPY') == ('USD', 'JPY')
+    assert parse_currency_pair('JPY=X', '') == ('USD', 'JPY')
+    assert parse_currency_pair('GBPJPY=X', '') == ('GBP', 'JPY')
+    assert parse_currency_pair('BTC-USD', 'Bitcoin USD') is False
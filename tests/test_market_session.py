@@ -0,0 +1,91 @@
+import datetime
+
+from market_data_scraper import MarketDataScraper, MarketSessionCalendar
+
+
+def _ts(calendar, *args):
+    return datetime.datetime(*args, tzinfo=calendar.tz).timestamp()
+
+
+def test_holidays_and_weekends():
+    calendar = MarketSessionCalendar()
+    assert not calendar.is_trading_day(datetime.date(2026, 4, 3))       # Good Friday
+    assert not calendar.is_trading_day(datetime.date(2026, 6, 19))      # Juneteenth
+    assert not calendar.is_trading_day(datetime.date(2026, 7, 3))       # July 4th on a saturday, observed friday
+    assert not calendar.is_trading_day(datetime.date(2026, 11, 26))     # Thanksgiving
+    assert not calendar.is_trading_day(datetime.date(2026, 10, 17))     # Saturday
+    assert calendar.is_trading_day(datetime.date(2026, 10, 19))
+
+
+def test_new_years_on_a_saturday_is_not_observed():
+    calendar = MarketSessionCalendar()
+    assert calendar.is_trading_day(datetime.date(2021, 12, 31))
+
+
+def test_early_closes():
+    calendar = MarketSessionCalendar()
+    _, close = calendar.session_bounds(datetime.date(2026, 11, 27))     # Day after thanksgiving
+    assert close == _ts(calendar, 2026, 11, 27, 13, 0)
+    _, close = calendar.session_bounds(datetime.date(2026, 12, 24))
+    assert close == _ts(calendar, 2026, 12, 24, 13, 0)
+
+
+def test_extra_holidays():
+    calendar = MarketSessionCalendar(extra_holidays=[datetime.date(2026, 10, 19)])
+    assert not calendar.is_trading_day(datetime.date(2026, 10, 19))
+
+
+def test_is_open():
+    calendar = MarketSessionCalendar()
+    assert calendar.is_open(_ts(calendar, 2026, 10, 19, 9, 30))
+    assert calendar.is_open(_ts(calendar, 2026, 10, 19, 15, 59))
+    assert not calendar.is_open(_ts(calendar, 2026, 10, 19, 16, 0))
+    assert not calendar.is_open(_ts(calendar, 2026, 10, 19, 9, 29))
+    assert not calendar.is_open(_ts(calendar, 2026, 10, 18, 12, 0))
+
+
+def test_last_close_over_a_weekend():
+    calendar = MarketSessionCalendar()
+    assert calendar.last_close(_ts(calendar, 2026, 10, 19, 10, 0)) == _ts(calendar, 2026, 10, 16, 16, 0)
+    assert calendar.last_close(_ts(calendar, 2026, 10, 19, 16, 0)) == _ts(calendar, 2026, 10, 19, 16, 0)
+
+
+class _ClosedCalendar:
+    """Market closed, last close 'ago' seconds back"""
+
+    def __init__(self, ago):
+        self.ago = ago
+
+    def is_open(self, ts):
+        return False
+
+    def last_close(self, ts):
+        return ts - self.ago
+
+
+def _guarded(tmp_path, ago):
+    scraper = MarketDataScraper(session_calendar=_ClosedCalendar(ago), session_cache_dir=str(tmp_path))
+    calls = list()
+
+    def fetch():
+        calls.append(1)
+        return {'AAA': {'fetch': len(calls)}}
+
+    return scraper, calls, lambda: scraper._session_guard('get_top_gaining_tickers_yf', fetch)
+
+
+def test_session_guard_fetches_until_the_close_settles(tmp_path):
+    scraper, calls, guarded = _guarded(tmp_path, ago=60)
+    guarded()
+    guarded()
+    assert len(calls) == 2
+
+
+def test_session_guard_serves_a_copy_of_the_snapshot(tmp_path):
+    scraper, calls, guarded = _guarded(tmp_path, ago=60 * 60)
+    first = guarded()
+    first['ZZZ'] = 1
+    second = guarded()
+    second['YYY'] = 1
+    assert guarded() == {'AAA': {'fetch': 1}}
+    assert len(calls) == 1
@@ -0,0 +1,93 @@
+from market_data_scraper import MarketDataScraper, RowFilter
+
+
+def test_symbol_patterns():
+    row_filter = RowFilter(include=['^A', '^B'], exclude=['Z$'])
+    assert row_filter.accepts_symbol('AAPL')
+    assert row_filter.accepts_symbol('BA')
+    assert not row_filter.accepts_symbol('MSFT')
+    assert not row_filter.accepts_symbol('ABZ')
+    assert RowFilter().accepts_symbol('ANYTHING')
+
+
+def test_values():
+    row_filter = RowFilter(min_volume=1000, min_abs_change_percent=2.0)
+    assert row_filter.filters_values
+    assert row_filter.accepts_values(1000, -2.5)
+    assert not row_filter.accepts_values(999, 5.0)
+    assert not row_filter.accepts_values(5000, 1.0)
+    assert not row_filter.accepts_values(False, 5.0)
+    assert not RowFilter().filters_values
+
+
+def test_values_are_only_converted_when_needed():
+    converted = list()
+
+    def volume():
+        converted.append('volume')
+        return 10
+
+    def change_percent():
+        converted.append('change')
+        return 5.0
+
+    assert not RowFilter(min_volume=1000, min_abs_change_percent=1.0).accepts_values(volume, change_percent)
+    assert converted == ['volume']
+    assert RowFilter(min_abs_change_percent=1.0).accepts_values(volume, change_percent)
+    assert converted == ['volume', 'change']
+
+
+def test_limit():
+    row_filter = RowFilter(limit=2)
+    assert not row_filter.is_full(1)
+    assert row_filter.is_full(2)
+    assert not RowFilter().is_full(10 ** 6)
+
+
+def test_keys():
+    row_filter = RowFilter(min_volume=1, include=['A'], limit=5)
+    assert row_filter.key() == RowFilter(min_volume=1, include=('A',), limit=5).key()
+    assert row_filter.cache_key() != RowFilter(min_volume=1, include=['A']).cache_key()
+    assert row_filter.without_limit().key() == RowFilter(min_volume=1, include=['A']).key()
+
+
+def _marketbeat_row(ticker, volume):
+    return (f'<tr><td><div>{ticker}</div><div>x</div></td><td>$10.00+1.5%</td><td>{volume}</td><td>100</td>'
+            f'<td>50%</td><td>1,000</td><td><a>Earnings</a></td></tr>')
+
+
+def _marketbeat_scraper():
+    pages = {
+        'call': [('AAA', '5,000'), ('AAB', '4,000'), ('AAC', '60,000')],
+        'put': [('BBB', '50,000'), ('BBC', '1,000')],
+    }
+    scraper = MarketDataScraper()
+    # Always parse, whatever time the tests run at
+    scraper.session_calendar = None
+
+    def fetch_page(url):
+        rows = pages['call'] if 'call' in url else pages['put']
+        return ('<table><tbody>' + ''.join(_marketbeat_row(*row) for row in rows) + '</tbody></table>').encode()
+
+    scraper._fetch_page = fetch_page
+    return scraper
+
+
+def _tickers(rows):
+    return [(row['ticker'], row['todaysOptionVolume']) for row in rows]
+
+
+def test_marketbeat_limit_keeps_the_highest_volume_across_both_sides():
+    rows = _marketbeat_scraper().get_unusual_option_volume_marketbeat(row_filter=RowFilter(limit=2))
+    assert _tickers(rows) == [('AAC', 60000), ('BBB', 50000)]
+
+
+def test_marketbeat_single_side_stops_at_the_limit():
+    rows = _marketbeat_scraper().get_unusual_option_volume_marketbeat(only_calls=True, row_filter=RowFilter(limit=2))
+    assert _tickers(rows) == [('AAA', 5000), ('AAB', 4000)]
+
+
+def test_marketbeat_filters_during_parsing():
+    rows = _marketbeat_scraper().get_unusual_option_volume_marketbeat(
+        row_filter=RowFilter(min_volume=4500, exclude=['^AAA$']))
+    assert _tickers(rows) == [('AAC', 60000), ('BBB', 50000)]